@@ -8,8 +8,22 @@ It initializes the main UI application and starts the event loop.
 Author: Icarus Murqin
 License: MIT 
 """
-from modules.ui import App
+import sys
+from modules.instance import SingleInstance, hand_off
 
 if __name__ == "__main__":
-    app = App()
+    # Only one instance may drive the hardware; a second launch (e.g. startup entry + shortcut)
+    # passes its arguments to the running one and exits before any heavy import
+    instance = SingleInstance()
+    if not instance.acquire():
+        sys.exit(hand_off(sys.argv[1:]))
+
+    from modules.profiling import Profiler
+
+    # Start --profile-cpu / --profile-mem captures before the heavy imports so they are included
+    profiler = Profiler.from_argv(sys.argv)
+    profiler.start()
+
+    from modules.ui import App
+    app = App(profiler=profiler)
     app.mainloop()
\ No newline at end of file
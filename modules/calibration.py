@@ -0,0 +1,175 @@
+# modules/calibration.py
+"""
+HID timing calibration for the VXE receiver.
+
+Sends the mode-switch sequences (SEQ_DPI_* then CMD_HZ_*) with progressively
+shorter delays and reads every written region back to check the switch landed.
+If the defaults fail, both delays are doubled until a switch verifies. Each
+delay is then searched on its own, the other held at that known-good value:
+halve it while all trials pass, then bisect between the last passing and the
+first failing value. The result gets
+a safety margin and is checked once more before it is saved per
+vid:pid:firmware in DATA_DIR/hid_timings.json, where VXEMouseBackend picks it up.
+
+Trials alternate between the game and desktop sequences, so every trial
+changes the device state. Table packets that are the same in both modes cannot
+be told apart from dropped ones by reading back; losing them changes nothing,
+so the timings found are safe for the sequences the backend sends.
+
+    python -m modules.calibration                 # the connected receiver (close the app first)
+    python -m modules.calibration --simulate --min-gap 0.006 --min-settle 0.09
+"""
+import sys
+import time
+import argparse
+import logging
+from typing import Callable, List, Optional
+from .hardware import VXEMouseBackend, HidTimings, save_timings
+
+logger = logging.getLogger(__name__)
+
+MODES = ("game", "desktop")
+
+class Calibrator:
+    """
+    Searches the shortest reliable HidTimings for an open device.
+
+    Args:
+        device: hidapi device (or SimulatedMCU) with write() and read(size, timeout_ms).
+        clock: monotonic() and sleep() provider; the time module or a VirtualClock.
+        trials: Mode switches that must all verify for a timing to pass.
+        resolution: Search stops when pass and fail are this close (s).
+        margin: Factor applied to the shortest passing delays.
+        max_delay: Upper bound when a default is too short (s).
+        verify_delay: Wait after the last packet before reading back (s).
+    """
+    def __init__(self, device, clock=time, trials: int = 3, resolution: float = 0.001, margin: float = 1.5,
+                 max_delay: float = 1.0, verify_delay: float = 0.1):
+        self.device, self.clock, self.trials = device, clock, trials
+        self.resolution, self.margin, self.max_delay, self.verify_delay = resolution, margin, max_delay, verify_delay
+        self.attempts = 0  # Mode switches tried
+        self._next = 0     # Index into MODES of the next trial
+
+    # --- Device I/O ---
+    def apply(self, mode: str, t: HidTimings):
+        """Sends a mode switch exactly as VXEMouseBackend._apply does, with timings `t`."""
+        seq, hz = VXEMouseBackend.PACKETS[mode]
+        for p in seq:
+            self.device.write(p)
+            self.clock.sleep(t.packet_gap)
+        self.clock.sleep(t.settle)
+        self.device.write(hz)
+
+    def read_region(self, addr: int, length: int, timeout_ms: int = 100) -> Optional[bytes]:
+        self.device.write(VXEMouseBackend.read_request(addr, length))
+        deadline = self.clock.monotonic() + timeout_ms / 1000
+        while self.clock.monotonic() < deadline:
+            r = self.device.read(64, timeout_ms)
+            # Skip unrelated input reports (e.g. battery status)
+            if len(r) >= 6 + length and r[0] == VXEMouseBackend.REPORT_ID and r[1] == VXEMouseBackend.READ and r[4] == addr:
+                return bytes(r[6:6 + length])
+        return None
+
+    def verify(self, mode: str) -> bool:
+        """Reads back every region the mode's sequence writes."""
+        self.clock.sleep(self.verify_delay)
+        seq, hz = VXEMouseBackend.PACKETS[mode]
+        return all(self.read_region(p[4], p[5]) == p[6:6 + p[5]] for p in seq + [hz])
+
+    # --- Search ---
+    def passes(self, t: HidTimings) -> bool:
+        for _ in range(self.trials):
+            mode = MODES[self._next]
+            self._next ^= 1
+            self.attempts += 1
+            self.apply(mode, t)
+            if not self.verify(mode):
+                logger.debug(f"{t} failed on {mode}")
+                return False
+        return True
+
+    def _baseline(self, t: HidTimings) -> Optional[HidTimings]:
+        """`t`, or the first doubling of both delays that passes; None past `max_delay`."""
+        while not self.passes(t):
+            t = HidTimings(t.packet_gap * 2, t.settle * 2)
+            if t.settle > self.max_delay: return None
+        return t
+
+    def _search(self, make: Callable[[float], HidTimings], good: float) -> float:
+        """Shortest delay d (to `resolution`) for which make(d) passes; make(good) is known to pass."""
+        bad = None
+        while good / 2 >= self.resolution:
+            if not self.passes(make(good / 2)):
+                bad = good / 2
+                break
+            good /= 2
+        if bad is None: return good
+        while good - bad > self.resolution:
+            mid = (good + bad) / 2
+            if self.passes(make(mid)): good = mid
+            else: bad = mid
+        return good
+
+    def _safe(self, d: float) -> float:
+        return round(max(d * self.margin, self.resolution) + 0.0005, 3)
+
+    def calibrate(self, start: HidTimings = HidTimings()) -> Optional[HidTimings]:
+        """Returns the calibrated timings, or None if the device never verified. Leaves it in desktop mode."""
+        result = None
+        try:
+            base = self._baseline(start)
+            if base is None: return None
+            gap = self._safe(self._search(lambda d: HidTimings(d, base.settle), base.packet_gap))
+            settle = self._search(lambda d: HidTimings(gap, d), base.settle)
+            # The margin is meant to cover jitter; make sure it does
+            t = HidTimings(gap, self._safe(settle))
+            if self.passes(t) and self.passes(t): result = t
+            return result
+        finally:
+            self._restore(result or start)
+
+    def _restore(self, t: HidTimings):
+        self.apply("desktop", t)
+        if not self.verify("desktop"): logger.warning("Could not confirm desktop mode after calibration")
+
+def _open_receiver() -> VXEMouseBackend:
+    backend = VXEMouseBackend()
+    if not backend.connect(): raise SystemExit("VXE receiver not found")
+    return backend
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m modules.calibration", description="Measure the shortest safe HID delays for the VXE receiver.")
+    ap.add_argument("--trials", type=int, default=3, help="Verified mode switches per candidate")
+    ap.add_argument("--dry-run", action="store_true", help="Do not save the result")
+    ap.add_argument("--simulate", action="store_true", help="Run against a simulated MCU on a virtual clock")
+    ap.add_argument("--min-gap", type=float, default=0.008, help="Simulated MCU: time to commit a report (s)")
+    ap.add_argument("--min-settle", type=float, default=0.12, help="Simulated MCU: table flash time before a rate write (s)")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.simulate:
+        from .fakes import SimulatedMCU, VirtualClock
+        clock = VirtualClock()
+        device, key = SimulatedMCU(clock, args.min_gap, args.min_settle), None
+    else:
+        clock = time
+        backend = _open_receiver()
+        device, key = backend.device, backend.key
+
+    cal = Calibrator(device, clock, trials=args.trials)
+    t0 = clock.monotonic()
+    result = cal.calibrate()
+    print(f"{cal.attempts} mode switches in {clock.monotonic() - t0:.1f}s{' (simulated)' if args.simulate else ''}")
+    if result is None:
+        print("Calibration failed: the device never verified; keeping the default timings.")
+        return 1
+    default = HidTimings()
+    print(f"packet gap {result.packet_gap * 1000:.0f} ms (default {default.packet_gap * 1000:.0f}), "
+          f"settle {result.settle * 1000:.0f} ms (default {default.settle * 1000:.0f})")
+    if key and not args.dry_run:
+        save_timings(key, result)
+        print(f"Saved for {key}; restart the app to use them.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
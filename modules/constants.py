@@ -1,9 +1,10 @@
 import os
+from .platforms import data_dir
 
 APP_NAME = "Specific Tool"
 VERSION = "2.2.0"
 
-DATA_DIR = os.path.join(os.getenv('APPDATA'), "Murqin", APP_NAME)
+DATA_DIR = data_dir(APP_NAME)
 LOG_FILE = os.path.join(DATA_DIR, "debug.log")
 CONFIG_FILE = os.path.join(DATA_DIR, "settings.json")
 
@@ -0,0 +1,153 @@
+# modules/control.py
+"""
+Local control channel for external tools (launchers, overlays).
+
+The running instance listens on 127.0.0.1 (ephemeral port) and writes the port and a
+random token to DATA_DIR/control.json. Requests and responses are single JSON lines::
+
+    -> {"token": "...", "cmd": "force-game", "args": {}}
+    <- {"ok": true, "result": {"state": "game", ...}}
+
+A response is only sent once the command has been applied, so for the force-*
+commands it doubles as the acknowledgement that the hardware writes are done.
+A connection may carry any number of requests.
+
+CLI: python -m modules.control <command>
+"""
+import os
+import sys
+import hmac
+import json
+import socket
+import secrets
+import argparse
+import threading
+import socketserver
+import logging
+from typing import Any, Callable, Dict, Optional
+from .constants import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+CONTROL_FILE = os.path.join(DATA_DIR, "control.json")
+COMMANDS = ("force-game", "force-desktop", "auto", "reload-config", "pause", "resume", "status", "show")
+MAX_LINE = 64 * 1024
+
+class ControlError(Exception):
+    """Raised by handlers (and the client) for a rejected or failed command."""
+
+class ControlServer:
+    """
+    Dispatches JSON-line commands from 127.0.0.1 to handlers.
+
+    Args:
+        handlers: Command name -> callable taking the request's "args" dict. The return
+            value (JSON serialisable) is sent back as "result".
+    """
+    def __init__(self, handlers: Dict[str, Callable[[dict], Any]], path: str = CONTROL_FILE):
+        self.handlers, self.path = handlers, path
+        self.token = secrets.token_hex(16)
+        self._server: Optional[socketserver.ThreadingTCPServer] = None
+
+    def dispatch(self, req: dict) -> dict:
+        if not hmac.compare_digest(str(req.get("token", "")), self.token):
+            return {"ok": False, "error": "invalid token"}
+        cmd = req.get("cmd")
+        handler = self.handlers.get(cmd)
+        if handler is None: return {"ok": False, "error": f"unknown command: {cmd}"}
+        try:
+            return {"ok": True, "result": handler(req.get("args") or {})}
+        except ControlError as e:
+            return {"ok": False, "error": str(e)}
+        except Exception as e:
+            logger.error(f"Control command '{cmd}' failed: {e}")
+            return {"ok": False, "error": str(e)}
+
+    def start(self) -> bool:
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                while True:
+                    line = self.rfile.readline(MAX_LINE)
+                    if not line: return
+                    try: req = json.loads(line)
+                    except ValueError: resp = {"ok": False, "error": "malformed request"}
+                    else: resp = server.dispatch(req) if isinstance(req, dict) else {"ok": False, "error": "malformed request"}
+                    self.wfile.write(json.dumps(resp).encode("utf-8") + b"\n")
+                    self.wfile.flush()
+
+        try:
+            self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+            self._server.daemon_threads = True
+            port = self._server.server_address[1]
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "w") as f:
+                json.dump({"port": port, "token": self.token, "pid": os.getpid()}, f)
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+            logger.info(f"Control channel listening on 127.0.0.1:{port}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to start control channel: {e}")
+            return False
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        try:
+            with open(self.path) as f:
+                if json.load(f).get("token") == self.token: os.remove(self.path)
+        except Exception: pass
+
+class ControlClient:
+    """Client side of the control channel. Keeps one connection open for repeated commands."""
+    def __init__(self, path: str = CONTROL_FILE, timeout: float = 5.0):
+        try:
+            with open(path) as f: info = json.load(f)
+        except (OSError, ValueError):
+            raise ControlError("no running instance found")
+        self._token = info.get("token", "")
+        try:
+            self._sock = socket.create_connection(("127.0.0.1", int(info["port"])), timeout=timeout)
+        except OSError as e:
+            raise ControlError(f"cannot reach running instance: {e}")
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._file = self._sock.makefile("rb")
+
+    def send(self, cmd: str, **args) -> Any:
+        """Sends `cmd` and blocks until the instance has applied it. Returns the handler's result."""
+        req = {"token": self._token, "cmd": cmd, "args": args}
+        self._sock.sendall(json.dumps(req).encode("utf-8") + b"\n")
+        line = self._file.readline(MAX_LINE)
+        if not line: raise ControlError("connection closed by instance")
+        resp = json.loads(line)
+        if not resp.get("ok"): raise ControlError(resp.get("error", "command failed"))
+        return resp.get("result")
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+def send_command(cmd: str, timeout: float = 5.0, **args) -> Any:
+    """One-shot helper: connect, send `cmd`, return its result."""
+    client = ControlClient(timeout=timeout)
+    try: return client.send(cmd, **args)
+    finally: client.close()
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m modules.control", description="Send a command to the running Specific Tool instance.")
+    ap.add_argument("command", choices=COMMANDS)
+    ap.add_argument("--timeout", type=float, default=5.0, help="Seconds to wait for the acknowledgement")
+    args = ap.parse_args(argv)
+    try:
+        print(json.dumps(send_command(args.command, timeout=args.timeout)))
+        return 0
+    except (ControlError, OSError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
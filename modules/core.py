@@ -1,20 +1,23 @@
 # modules/core.py
 import os
 import json
+import ntpath
 import sys
 import shutil
 from pathlib import Path
-import winreg
 import time
-import psutil
-import win32gui
-import win32process
 import atexit
+import queue
+import threading
+import traceback
 import logging
 from logging.handlers import RotatingFileHandler
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, NamedTuple, Set, Tuple
 from .constants import APP_NAME, DATA_DIR, LOG_FILE, CONFIG_FILE
-from .hardware import IMouseBackend, IGPUBackend, IOSMouseService
+from .hardware import IMouseBackend, IGPUBackend, IOSMouseService, CancelToken, TransitionCancelled, BackendTimeout, write_failures
+from .process import IForegroundSource, IProcessSource, ForegroundInfo, EMPTY
+from .platforms import IStartupService, startup_service, foreground_source
+from .metrics import METRICS
 
 def setup_logging():
     if not os.path.exists(DATA_DIR):
@@ -39,16 +42,29 @@ def setup_logging():
 setup_logging()
 logger = logging.getLogger(__name__)
 
+_WAKEUPS = METRICS.counter("specific_tool_engine_wakeups_total", "Automation loop iterations.")
+_TRANSITIONS = METRICS.counter("specific_tool_engine_transitions_total", "Profile transitions applied, by source and target state.")
+_TRANSITION_SECONDS = METRICS.histogram("specific_tool_engine_transition_seconds", "Time spent applying a profile transition, by target state.")
+_STATE = METRICS.gauge("specific_tool_engine_state", "1 for the current engine state, 0 otherwise.")
+_RUNNING = METRICS.gauge("specific_tool_engine_running", "1 while automation is enabled.")
+_CANCELLED = METRICS.counter("specific_tool_engine_transitions_cancelled_total", "Transitions aborted at a checkpoint, by the target they were heading for.")
+_COMMAND_SECONDS = METRICS.histogram("specific_tool_engine_command_seconds", "Time from posting an engine command to its completion, by command.")
+_INBOX_DEPTH = METRICS.gauge("specific_tool_engine_inbox_depth", "Commands waiting in the engine inbox.")
+_PRESTAGED = METRICS.counter("specific_tool_engine_prestaged_total", "Game launches seen by the process watcher that pre-staged game mode.")
+_PRESTAGE_SECONDS = METRICS.histogram("specific_tool_engine_prestage_seconds", "Time spent preparing the backends for a launched game.")
+_STALLS = METRICS.counter("specific_tool_engine_stalls_total", "Times the automation loop missed its heartbeat.")
+_APPLIER_CALLS = METRICS.counter("specific_tool_applier_values_total", "Values submitted to latest-wins appliers, by applier and outcome (issued/coalesced).")
+
 
 
 class AppManager:
     """
     Manages application installation and startup persistence.
     
-    Handles startup registry operations
-    the Windows Registry key for startup execution.
+    Startup registration goes through the platform's IStartupService
+    (the Windows Registry Run key, or an XDG autostart entry on Linux).
     """
-    def __init__(self):
+    def __init__(self, startup: Optional[IStartupService] = None):
         self.appdata_dir = DATA_DIR
         if getattr(sys, 'frozen', False):
             self.current_path = sys.executable
@@ -57,62 +73,69 @@ class AppManager:
             self.current_path = os.path.abspath(sys.argv[0])
             self.exe_name = f"{APP_NAME}.exe"
         self.target_path = self.current_path
-        self.reg_key = r"Software\Microsoft\Windows\CurrentVersion\Run"
+        self.startup = startup or startup_service(APP_NAME)
 
     def is_startup_enabled(self) -> bool:
         try:
-            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, self.reg_key, 0, winreg.KEY_READ)
-            val, _ = winreg.QueryValueEx(key, APP_NAME)
-            winreg.CloseKey(key)
-            return self.current_path in val
+            val = self.startup.get()
+            return bool(val) and self.current_path in val
         except Exception as e:
             logger.warning(f"Failed to check startup status: {e}")
             return False
 
+    def startup_command(self, minimized: bool = False) -> str:
+        """Command line registered for startup, optionally with --minimized."""
+        cmd = self.startup.command(self.target_path)
+        return cmd + " --minimized" if minimized else cmd
+
     def set_startup(self, enable=True):
         try:
-            import subprocess
-            if enable:
-                subprocess.run([
-                "powershell",
-                "-Command",
-                "Start-Process reg -ArgumentList 'add HKCU\\Software\\Microsoft\\Windows\\CurrentVersion\\Run /v \"%s\" /t REG_SZ /d \"%s\" /f' -Verb RunAs" 
-                % (APP_NAME, self.current_path)
-                ])
-            else:
-                subprocess.run([
-                "powershell",
-                "-Command",
-                "Start-Process reg -ArgumentList 'delete HKCU\\Software\\Microsoft\\Windows\\CurrentVersion\\Run /v \"%s\" /f' -Verb RunAs" 
-                % APP_NAME
-            ])
+            if enable: self.startup.set(self.startup_command())
+            else: self.startup.remove()
             return True
         except Exception as e:
             logger.error(f"Failed to set startup: {e}")
             return False
 
     def set_startup_value(self, val):
-        try:
-            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, self.reg_key, 0, winreg.KEY_ALL_ACCESS)
-            winreg.SetValueEx(key, APP_NAME, 0, winreg.REG_SZ, val)
-            winreg.CloseKey(key)
+        try: self.startup.set(val)
         except: pass
 
+class ConfigChange(NamedTuple):
+    """What a ConfigManager.reload() changed."""
+    added: Tuple[str, ...] = ()     # Game entries
+    removed: Tuple[str, ...] = ()
+    settings: Dict[str, Any] = {}   # Changed keys -> new value
+
+    @property
+    def empty(self) -> bool: return not (self.added or self.removed or self.settings)
+
 class ConfigManager:
     """
     Manages application settings and game profiles.
     
     Loads and saves configuration from a JSON file in the AppData directory.
+    The file can be replaced while the app runs: changed_on_disk() notices a write
+    that did not come from save(), and reload() validates it and merges it in place.
     """
-    def __init__(self):
-        self.path = CONFIG_FILE
+    DEFAULTS: Dict[str, Any] = {
+        "start_in_tray": False, 
+        "single_monitor": True, 
+        "startup": False,
+        "murqin_mode": False,
+        "metrics_port": 0,  # Local Prometheus endpoint, 0 = disabled
+        "control_api": True,  # Local control channel for launchers/overlays
+        "persist_pointer_speed": False,  # Write pointer speed to the registry + broadcast on every change
+        "prestage": True,  # Prepare the backends as soon as a game process starts
+        "watch_config": True,  # Pick up edits to this file without a restart
+        "journal": True  # Binary transition journal for usage analytics (python -m modules.journal)
+    }
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or CONFIG_FILE
         self.games: List[str] = []
-        self.settings: Dict[str, Any] = {
-            "start_in_tray": False, 
-            "single_monitor": True, 
-            "startup": False,
-            "murqin_mode": False
-        }
+        self.settings: Dict[str, Any] = dict(self.DEFAULTS)
+        self._stamp = None  # (mtime_ns, size) of the file as last read or written by us
         self._load()
 
     @property
@@ -124,15 +147,72 @@ class ConfigManager:
         self.settings["murqin_mode"] = value
         self.save()
 
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def changed_on_disk(self) -> bool:
+        """True if the file was written by someone else since we last read or saved it."""
+        stamp = self._file_stamp()
+        return stamp is not None and stamp != self._stamp
+
+    def _read(self) -> Tuple[Optional[List[str]], Dict[str, Any]]:
+        """
+        Reads and validates the file. Raises ValueError (incl. JSONDecodeError) if it is unusable.
+        Games are None if the file has no "games" key (the current list is kept).
+        """
+        with open(self.path, "r") as f:
+            data = json.load(f)
+        if isinstance(data, list): data = {"games": data}  # Old format: just the game list
+        if not isinstance(data, dict): raise ValueError("top level must be an object")
+        games, settings = data.get("games"), data.get("settings", {})
+        if games is not None and (not isinstance(games, list) or not all(isinstance(g, str) for g in games)):
+            raise ValueError("'games' must be a list of strings")
+        if not isinstance(settings, dict): raise ValueError("'settings' must be an object")
+        for k, v in settings.items():
+            default = self.DEFAULTS.get(k)
+            if default is not None and type(v) is not type(default):
+                raise ValueError(f"setting '{k}' must be {type(default).__name__}, got {type(v).__name__}")
+        # Same normalisation as the UI applies when adding a game
+        if games is not None: games = list(dict.fromkeys(g.lower().strip() for g in games if g.strip()))
+        return games, settings
+
+    def reload(self) -> Optional[ConfigChange]:
+        """
+        Re-reads the settings file and merges it in place.
+
+        Returns:
+            ConfigChange: What changed (possibly nothing), or None if the file is
+            invalid, in which case the current configuration is kept.
+        """
+        self._stamp = self._file_stamp()
+        try:
+            games, settings = self._read()
+        except (OSError, ValueError) as e:
+            logger.error(f"Ignoring invalid settings file: {e}")
+            return None
+        if games is None: games = list(self.games)
+        old, new = set(self.games), set(games)
+        change = ConfigChange(
+            tuple(g for g in games if g not in old),
+            tuple(g for g in self.games if g not in new),
+            {k: v for k, v in settings.items() if self.settings.get(k) != v},
+        )
+        self.games[:] = games
+        self.settings.update(change.settings)
+        if not change.empty: logger.info(f"Settings reloaded: +{list(change.added)} -{list(change.removed)} {change.settings}")
+        return change
+
     def _load(self):
         if not os.path.exists(self.path): return
+        self._stamp = self._file_stamp()
         try:
-            with open(self.path, "r") as f:
-                data = json.load(f)
-                if isinstance(data, list): self.games = data
-                else:
-                    self.games = data.get("games", [])
-                    self.settings.update(data.get("settings", {}))
+            games, settings = self._read()
+            if games is not None: self.games = games
+            self.settings.update(settings)
         except json.JSONDecodeError:
             logger.error("Settings file is corrupted. Using defaults.")
         except Exception as e:
@@ -142,11 +222,47 @@ class ConfigManager:
         if not os.path.exists(os.path.dirname(self.path)): os.makedirs(os.path.dirname(self.path))
         with open(self.path, "w") as f:
             json.dump({"games": self.games, "settings": self.settings}, f)
+        self._stamp = self._file_stamp()
+
+class ConfigWatcher:
+    """Polls the settings file every `interval` seconds and calls `on_change` when it was rewritten by someone else."""
+    def __init__(self, cfg: ConfigManager, on_change: Callable[[], None], interval: float = 1.0):
+        self.cfg, self.on_change, self.interval = cfg, on_change, interval
+        self._stop = threading.Event()
+
+    def loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if self.cfg.changed_on_disk(): self.on_change()
+            except Exception as e:
+                logger.error(f"Config watcher error: {e}")
+
+    def start(self) -> "ConfigWatcher":
+        threading.Thread(target=self.loop, name="ConfigWatcher", daemon=True).start()
+        return self
+
+    def stop(self): self._stop.set()
 
 class ProcessMonitor:
     """
     Monitors the active foreground window to detect running games.
     """
+    def __init__(self, source: Optional[IForegroundSource] = None):
+        self.source = source or foreground_source()
+
+    def get_active(self) -> ForegroundInfo:
+        """
+        Retrieves the image name, full path and window class of the foreground window.
+
+        Returns:
+            ForegroundInfo: The lookup result, or an empty ForegroundInfo if failed.
+        """
+        try:
+            return self.source.get_foreground()
+        except Exception as e:
+            logger.debug(f"Process monitor error: {e}")
+            return EMPTY
+
     def get_active_exe(self) -> str:
         """
         Retrieves the executable name of the current foreground window.
@@ -154,17 +270,120 @@ class ProcessMonitor:
         Returns:
             str: The executable name (lowercase), or empty string if failed.
         """
-        try:
-            hwnd = win32gui.GetForegroundWindow()
-            if not hwnd: return ""
-            _, pid = win32process.GetWindowThreadProcessId(hwnd)
-            if pid <= 0: return ""
-            return psutil.Process(pid).name().lower()
-        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-            return ""
-        except Exception as e:
-            logger.debug(f"Process monitor error: {e}")
-            return ""
+        return self.get_active().exe
+
+class ProcessStartWatcher:
+    """
+    Spots new processes as soon as they are created, before they have a window.
+
+    Diffs the PID list of `source` every `interval` seconds; only PIDs not seen before
+    have their image resolved. Each new process accepted by `want` is passed to
+    `on_start`. Processes already running on the first scan are not reported.
+    """
+    def __init__(self, source: IProcessSource, on_start: Callable[[ForegroundInfo], None],
+                 want: Callable[[ForegroundInfo], bool], interval: float = 1.0):
+        self.source, self.on_start, self.want, self.interval = source, on_start, want, interval
+        self._known: Optional[Set[int]] = None
+        self._stop = threading.Event()
+
+    def poll(self) -> List[ForegroundInfo]:
+        """Takes one snapshot and reports the wanted processes started since the last one."""
+        pids = self.source.pids()
+        new, self._known = (pids - self._known if self._known is not None else set()), pids
+        started = []
+        for pid in new:
+            path = self.source.image_path(pid)
+            if not path: continue
+            info = ForegroundInfo(ntpath.basename(path).lower(), path, "", pid)
+            if self.want(info):
+                started.append(info)
+                self.on_start(info)
+        return started
+
+    def loop(self):
+        while not self._stop.is_set():
+            try: self.poll()
+            except Exception as e: logger.error(f"Process watcher error: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self) -> "ProcessStartWatcher":
+        threading.Thread(target=self.loop, name="ProcessStartWatcher", daemon=True).start()
+        return self
+
+    def stop(self): self._stop.set()
+
+class GameMatcher:
+    """
+    Index over the configured game entries, updated incrementally.
+
+    Entries are matched against the executable name, unless they contain a path
+    separator (matched against the full image path) or start with "class:"
+    (matched against the window class). "class:" entries are a set lookup, path and
+    name entries stay substring checks. Results are cached per ForegroundInfo, as the
+    same few windows are polled over and over; the cache is dropped on every update.
+    Thread-safe, since the process watcher asks from its own thread.
+    """
+    CACHE_SIZE = 256
+
+    def __init__(self, games: List[str] = ()):
+        self._classes: Set[str] = set()
+        self._paths: Set[str] = set()
+        self._names: Set[str] = set()
+        self._cache: Dict[ForegroundInfo, bool] = {}
+        self._lock = threading.Lock()
+        self.update(games, ())
+
+    def _bucket(self, entry: str) -> Tuple[Set[str], str]:
+        if entry.startswith("class:"): return self._classes, entry[6:]
+        if "\\" in entry or "/" in entry: return self._paths, entry.replace("/", "\\")
+        return self._names, entry
+
+    def update(self, added, removed):
+        with self._lock:
+            for e in removed:
+                if not e: continue
+                bucket, key = self._bucket(e)
+                bucket.discard(key)
+            for e in added:
+                if not e: continue
+                bucket, key = self._bucket(e)
+                bucket.add(key)
+            self._cache.clear()
+
+    def match(self, info: ForegroundInfo) -> bool:
+        if not info.exe: return False
+        with self._lock:
+            hit = self._cache.get(info)
+            if hit is None:
+                path = info.path.lower()
+                hit = (info.window_class.lower() in self._classes
+                       or any(p in path for p in self._paths)
+                       or any(n in info.exe for n in self._names))
+                if len(self._cache) >= self.CACHE_SIZE: self._cache.clear()
+                self._cache[info] = hit
+            return hit
+
+class Command:
+    """
+    A message for the AutomationEngine inbox.
+
+    Posted from any thread; processed in order on the engine thread. wait() blocks
+    until it has been processed and returns the handler's result.
+    """
+    __slots__ = ("kind", "args", "posted_at", "result", "error", "_done")
+
+    def __init__(self, kind: str, *args):
+        self.kind, self.args = kind, args
+        self.posted_at = time.perf_counter()
+        self.result, self.error = None, None
+        self._done = threading.Event()
+
+    def done(self) -> bool: return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> Any:
+        if not self._done.wait(timeout): raise TimeoutError(f"engine did not process '{self.kind}' in time")
+        if self.error: raise self.error
+        return self.result
 
 class AutomationEngine:
     """
@@ -172,62 +391,408 @@ class AutomationEngine:
     
     Runs in a background thread, monitors the active process, and switches
     profiles (Mouse/GPU) based on whether a configured game is active.
+
+    The engine is an actor: its state (`running`, `current_state`, `override`) and
+    every hardware call belong to the engine thread. Other threads read the state
+    but change it only by posting commands to the inbox:
+
+        foreground(info)             foreground window changed (also produced by polling)
+        force(target)                pin to "game"/"desktop", or None for automatic; ignored while paused
+        pause(restore) / resume()    stop/start automation; `restore` runs on stop
+        toggle(restore)              pause if running, resume otherwise
+        vibrance(level, primary_only, mode)
+                                     live slider value, applied if `mode` is active
+        prestage(info)               a game process was just launched: prepare the backends
+                                     and switch as soon as its PID has the foreground
+        config(change)               games/settings changed (ConfigChange): update the matcher
+                                     and re-evaluate the foreground app
+        status()                     snapshot of the engine state
+        shutdown(restore)            stop the loop after running `restore`
+
+    `clock` only needs `monotonic()` and `sleep()`; the replay harness passes a
+    virtual clock and drives tick()/handle() directly instead of loop().
+    `journal` (a modules.journal.Journal) gets one record per transition attempt.
     """
-    def __init__(self, config: ConfigManager, mouse: IMouseBackend, gpu: IGPUBackend, os_mouse: IOSMouseService, ui_provider):
+    POLL_INTERVAL = 0.5
+    STABLE_POLLS = 2
+    PROFILE_SETTINGS = {"single_monitor", "murqin_mode"}  # Settings that change what a profile writes
+
+    def __init__(self, config: ConfigManager, mouse: IMouseBackend, gpu: IGPUBackend, os_mouse: IOSMouseService, ui_provider, monitor: Optional[ProcessMonitor] = None, clock=None, journal=None):
         self.cfg, self.mouse, self.gpu, self.os_mouse = config, mouse, gpu, os_mouse
         self.ui_provider = ui_provider
         self.running = True
         self.current_state = "unknown"
-        self._pm = ProcessMonitor()
+        self._pm = monitor or ProcessMonitor()
+        self.clock = clock or time
+        self._stable, self._last = 0, EMPTY
+        self.override: Optional[str] = None  # "game"/"desktop" when forced over the control channel
+        self.inbox: "queue.Queue[Command]" = queue.Queue()
+        self._stopped = False
+        self._inflight: Optional[tuple] = None  # (target, CancelToken) while a transition runs
+        self._prestaged = 0  # PID of the last launched game the backends were prepared for
+        self._skipped: Set[str] = set()  # Backends left out of the last profile because they were stuck
+        self._probed = (EMPTY, 0.0)  # (foreground, first seen) as last seen by the checkpoint probe
+        self.matcher = GameMatcher(config.games)
+        self.journal = journal
+        self._changed_at = self._settled_at = self.clock.monotonic()  # Last foreground change / finished transition
+        self.heartbeat = time.monotonic()  # Stamped by loop() on every iteration, for the Watchdog
+        self.thread_id: Optional[int] = None
+        _INBOX_DEPTH.fn = self.inbox.qsize
+
+    # --- Posting (any thread) ---
+
+    def post(self, kind: str, *args) -> Command:
+        """Queues a command for the engine thread and returns it without waiting."""
+        cmd = Command(kind, *args)
+        self.inbox.put(cmd)
+        # Commands that make the in-flight transition pointless abort it at its next checkpoint
+        inflight = self._inflight
+        if inflight and kind in ("pause", "toggle", "shutdown", "force"):
+            if kind != "force" or args[0] not in (None, inflight[0]): inflight[1].cancel()
+        return cmd
+
+    def call(self, kind: str, *args, timeout: Optional[float] = None) -> Any:
+        """Posts a command and waits until the engine thread has processed it."""
+        return self.post(kind, *args).wait(timeout)
+
+    # --- Engine thread ---
+
+    def loop(self):
+        self.thread_id = threading.get_ident()
+        next_poll = self.clock.monotonic()
+        while not self._stopped:
+            self.heartbeat = time.monotonic()
+            wait = next_poll - self.clock.monotonic()
+            if wait > 0:
+                try:
+                    self.handle(self.inbox.get(timeout=wait))
+                    continue
+                except queue.Empty:
+                    pass
+            next_poll = self.clock.monotonic() + self.tick()
+
+    def handle(self, cmd: Command):
+        """Processes one command. Only called on the engine thread."""
+        try:
+            cmd.result = getattr(self, f"_on_{cmd.kind}")(*cmd.args)
+        except Exception as e:
+            logger.error(f"Engine command '{cmd.kind}' failed: {e}")
+            cmd.error = e
+        finally:
+            _COMMAND_SECONDS.observe(time.perf_counter() - cmd.posted_at, command=cmd.kind)
+            cmd._done.set()
+
+    def is_game(self, info: ForegroundInfo) -> bool:
+        return self.matcher.match(info)
+
+    def _classify(self, info: ForegroundInfo) -> str:
+        return "game" if self.is_game(info) else "desktop"
+
+    def tick(self) -> float:
+        """
+        Runs one polling step: samples the foreground window and switches profiles
+        once it has been stable for STABLE_POLLS polls.
+
+        Returns:
+            float: Seconds to wait before the next step.
+        """
+        _WAKEUPS.inc()
+        _RUNNING.set(1 if self.running else 0)
+        if not self.running: return 1.0
+        try:
+            self._on_foreground(self._pm.get_active())
+        except Exception as e:
+            logger.error(f"Automation loop error: {e}")
+        return self.POLL_INTERVAL
+
+    def _on_foreground(self, info: ForegroundInfo):
+        if info != self._last: self._stable = 0; self._last = info; self._changed_at = self.clock.monotonic()
+        else: self._stable += 1
+        # A pre-staged game skips the stability delay: its launch was already seen
+        if self.running and (self._stable >= self.STABLE_POLLS or (info.pid and info.pid == self._prestaged)):
+            self.transition(self.override or self._classify(info), reapply=self._recovered())
+
+    def _recovered(self) -> bool:
+        """True once a backend skipped as stuck responds again, so the profile it missed is re-applied."""
+        return any(not getattr(getattr(self, name), "stuck", None) for name in self._skipped)
+
+    def _on_config(self, change: ConfigChange):
+        self.matcher.update(change.added, change.removed)
+        # Only switch if the foreground app's classification changed, unless the profile itself did
+        if self.running and self.current_state != "unknown":
+            self.transition(self.override or self._classify(self._last), reapply=bool(self.PROFILE_SETTINGS & change.settings.keys()))
+        return self._on_status()
+
+    def _on_force(self, target: Optional[str]):
+        # Rejected while paused (the caller sees running=False): a stored override would pin the engine after resume
+        if not self.running: return self._on_status()
+        self.override = target
+        self.transition(target or self._classify(self._pm.get_active()))
+        return self._on_status()
+
+    def _on_pause(self, restore: Optional[Callable[[], None]] = None):
+        if self.running:
+            self.running = False
+            if restore: restore()
+            self._journal(self.current_state, "unknown", "ok", self.clock.monotonic(), write_failures())
+            self.current_state = "unknown"
+            self._notify_running()
+        return self._on_status()
+
+    def _on_resume(self):
+        if not self.running:
+            self.running = True
+            self._stable = 0
+            self._notify_running()
+        return self._on_status()
+
+    def _on_toggle(self, restore: Optional[Callable[[], None]] = None):
+        return self._on_pause(restore) if self.running else self._on_resume()
+
+    def _on_vibrance(self, level: int, primary_only: bool, mode: str):
+        if self.running and self.current_state == mode and "gpu" not in self._skipped:
+            self.gpu.set_vibrance(level, primary_only)
+
+    def _on_prestage(self, info: ForegroundInfo):
+        if not self.running or self.override == "desktop" or self.current_state == "game": return
+        started = time.perf_counter()
+        mouse_ok, gpu_ok = self.mouse.prepare(), self.gpu.prepare()
+        self._prestaged = info.pid
+        _PRESTAGED.inc()
+        _PRESTAGE_SECONDS.observe(time.perf_counter() - started)
+        logger.info(f"Pre-staged game mode for {info.exe} (pid {info.pid}); mouse {'ready' if mouse_ok else 'missing'}, gpu {'ready' if gpu_ok else 'unavailable'}")
+
+    def _on_status(self) -> Dict[str, Any]:
+        return {"state": self.current_state, "running": self.running, "override": self.override, "foreground": self._last.exe}
+
+    def _on_shutdown(self, restore: Optional[Callable[[], None]] = None):
+        self._stopped = True
+        if restore: restore()
+        if self.current_state != "unknown":
+            self._journal(self.current_state, "unknown", "ok", self.clock.monotonic(), write_failures())
+
+    def _notify_running(self):
+        _RUNNING.set(1 if self.running else 0)
+        cb = self.ui_provider('running')
+        if cb: cb(self.running)
+
+    def transition(self, target: str, reapply: bool = False):
+        """
+        Applies the hardware profile for `target` ("game" or "desktop") unless already active (or `reapply`).
+
+        The transition is cancellable: if the foreground changes to something that
+        wants the other profile, it stops at the next checkpoint and goes straight to
+        the new target. If it is cancelled by a command (pause, force, shutdown) it
+        just stops; the command runs next.
+        """
+        while target and (self.current_state != target or reapply):
+            token = CancelToken(probe=lambda t=target: self._superseding(t))
+            self._probed = (EMPTY, 0.0)
+            self._inflight = (target, token)
+            source, started, failures = self.current_state, self.clock.monotonic(), write_failures()
+            try:
+                self._apply_profile(target, token)
+                self._journal(source, target, "ok", started, failures)
+                return
+            except TransitionCancelled as e:
+                # Part of the old profile may already be on the hardware
+                self.current_state = "unknown"
+                _CANCELLED.inc(target=target)
+                logger.info(f"Transition to {target} {e}")
+                self._journal(source, target, "cancelled", started, failures)
+                target, reapply = e.superseded_by, False
+            except Exception:
+                # E.g. a backend error: the hardware is in an unknown state, so the next poll retries
+                self.current_state = "unknown"
+                self._journal(source, target, "failed", started, failures)
+                raise
+            finally:
+                self._inflight = None
+
+    def _journal(self, source: str, target: str, outcome: str, started: float, failures_before: int):
+        if not self.journal: return
+        now = self.clock.monotonic()
+        # A transition that follows a foreground change is a reaction to it: measure from the change
+        origin = self._changed_at if self._changed_at > self._settled_at else started
+        if outcome != "cancelled": self._settled_at = now
+        try:
+            self.journal.record(self._last.exe, source, target, outcome, now - origin, write_failures() - failures_before)
+        except Exception as e:
+            logger.error(f"Journal write failed: {e}")
+
+    def _superseding(self, target: str) -> Optional[str]:
+        """
+        Checkpoint probe: the state the engine should now be heading for, if not `target`.
+
+        Debounced like the loop: a foreground window only counts once it has stayed in
+        front for STABLE_POLLS poll intervals, so a brief Alt-Tab does not reverse the switch.
+        """
+        if self.override: return self.override if self.override != target else None
+        info = self._pm.get_active()
+        if info == EMPTY: return None  # No foreground window (e.g. mid Alt-Tab): no opinion
+        now = self.clock.monotonic()
+        if info != self._probed[0]: self._probed = (info, now)
+        if now - self._probed[1] < self.STABLE_POLLS * self.POLL_INTERVAL: return None
+        desired = self._classify(info)
+        return desired if desired != target else None
+
+    def _apply_profile(self, target: str, token: CancelToken):
+        """
+        Writes the profile to every backend. A backend stuck past its Bounded deadline
+        is skipped (logged once per stall) so the others still switch; see _recovered().
+        """
+        started, source = time.perf_counter(), self.current_state
+        stalled, self._skipped = self._skipped, set()
+
+        def write(name: str, method: str, *args):
+            try: getattr(getattr(self, name), method)(*args)
+            except BackendTimeout as e:
+                self._skipped.add(name)
+                if name not in stalled: logger.warning(f"{e}; skipping {name} until it responds")
+        v_desk = self.ui_provider('vib_desk')
+        v_game = self.ui_provider('vib_game')
+        murqin = self.ui_provider('murqin')
+        single_mon = self.cfg.settings.get("single_monitor", True)
+
+        if target == "game":
+            write("gpu", "set_vibrance", v_game, single_mon, token)
+            write("mouse", "set_game_mode", token)
+            
+            # Sync Murqin Mode from UI to Config if changed, or enforce config
+            # Since we can't easily read UI state here without a callback, we rely on the UI calling us or us checking a shared state.
+            # However, the requirement is "remember on next startup".
+            # So we just need to make sure that when the UI toggles it, it saves to config.
+            # But here in the loop, we are applying the mode.
+            
+            if murqin: 
+                write("os_mouse", "optimize", 800, 1600, token)
+                if not self.cfg.murqin_mode: # If config says False but UI says True (user toggled it on)
+                    self.cfg.murqin_mode = True
+            else:
+                if self.cfg.murqin_mode: # If config says True but UI says False (user toggled it off)
+                    self.cfg.murqin_mode = False
+            
+            self.ui_provider('status')("GAME MODE ACTIVE", True)
+            self.current_state = "game"
+        else:
+            write("gpu", "set_vibrance", v_desk, single_mon, token)
+            write("mouse", "set_desktop_mode", token)
+            write("os_mouse", "reset", token)
+            self.ui_provider('status')("DESKTOP MODE", False)
+            self.current_state = "desktop"
+
+        _TRANSITIONS.inc(source=source, target=target)
+        _TRANSITION_SECONDS.observe(time.perf_counter() - started, target=target)
+        for state in ("unknown", "game", "desktop"): _STATE.set(1 if state == self.current_state else 0, state=state)
+
+class Watchdog:
+    """
+    Detects a stalled AutomationEngine loop.
+
+    The loop stamps `engine.heartbeat` on every iteration, at least once a second
+    even when idle. If the stamp gets older than `stall_after` seconds, the engine
+    thread's stack is logged once and `on_change` is called; it is called again on
+    every check while the stall lasts and once more when the loop beats again.
+    """
+    def __init__(self, engine: AutomationEngine, on_change: Optional[Callable[[], None]] = None,
+                 stall_after: float = 10.0, interval: float = 1.0):
+        self.engine, self.on_change, self.stall_after, self.interval = engine, on_change, stall_after, interval
+        self.stalled_for = 0.0  # Seconds since the last heartbeat while stalled, else 0
+        self._stop = threading.Event()
+
+    def check(self) -> float:
+        age = time.monotonic() - self.engine.heartbeat
+        if age > self.stall_after:
+            if not self.stalled_for:
+                _STALLS.inc()
+                logger.error(f"Automation engine stalled: no heartbeat for {age:.1f}s. Stack:\n{self._stack()}")
+            self.stalled_for = age
+        elif self.stalled_for:
+            logger.warning(f"Automation engine recovered after {self.stalled_for:.1f}s")
+            self.stalled_for = 0.0
+        else:
+            return 0.0
+        if self.on_change: self.on_change()
+        return self.stalled_for
+
+    def _stack(self) -> str:
+        frame = sys._current_frames().get(self.engine.thread_id)
+        return "".join(traceback.format_stack(frame)) if frame else "  (engine thread not running)"
 
     def loop(self):
-        stable, req, last = 0, 2, ""
+        while not self._stop.wait(self.interval):
+            try: self.check()
+            except Exception as e: logger.error(f"Watchdog error: {e}")
+
+    def start(self) -> "Watchdog":
+        threading.Thread(target=self.loop, name="Watchdog", daemon=True).start()
+        return self
+
+    def stop(self): self._stop.set()
+
+_NOTHING = object()
+
+class LatestValueApplier:
+    """
+    Applies values on a background thread, keeping only the most recent one.
+
+    Used for slider drags: every motion event submits a value, but `apply` runs at
+    most once per `min_interval`, always with the newest value. Values replaced
+    before they were applied are counted as coalesced. flush() skips the rate cap
+    so the final value of a drag is written right away.
+    """
+    def __init__(self, apply: Callable[[Any], None], min_interval: float = 0.05, name: str = "applier"):
+        self._apply, self.min_interval, self.name = apply, min_interval, name
+        self._cond = threading.Condition()
+        self._pending: Any = _NOTHING
+        self._last: Any = _NOTHING  # Last value handed to `apply` (possibly still being applied)
+        self._last_at = 0.0
+        self._urgent = False
+        self.issued = self.coalesced = 0
+        threading.Thread(target=self._run, name=name, daemon=True).start()
+
+    def submit(self, value: Any):
+        with self._cond:
+            if self._pending is not _NOTHING:
+                self.coalesced += 1
+                _APPLIER_CALLS.inc(applier=self.name, outcome="coalesced")
+            self._pending = value
+            self._cond.notify()
+
+    def flush(self, value: Any = _NOTHING):
+        """
+        Applies `value` (or whatever is pending) without waiting for the rate cap.
+        `value` always replaces a pending one; it is only skipped if nothing is pending
+        and it is the value last applied.
+        """
+        with self._cond:
+            if value is not _NOTHING and (self._pending is not _NOTHING or value != self._last):
+                if self._pending is not _NOTHING and self._pending != value:
+                    self.coalesced += 1
+                    _APPLIER_CALLS.inc(applier=self.name, outcome="coalesced")
+                self._pending = value
+            if self._pending is not _NOTHING:
+                self._urgent = True
+                self._cond.notify()
+
+    def _run(self):
         while True:
-            if not self.running: time.sleep(1); continue
+            with self._cond:
+                while self._pending is _NOTHING: self._cond.wait()
+                wait = self._last_at + self.min_interval - time.monotonic()
+                if wait > 0 and not self._urgent:
+                    self._cond.wait(wait)
+                    continue
+                value, self._pending, self._urgent = self._pending, _NOTHING, False
+                self._last = value  # Set now, so a flush() of this value while it is applied is skipped
             try:
-                curr = self._pm.get_active_exe()
-                if curr != last: stable = 0; last = curr
-                else: stable += 1
-                
-                if stable < req: time.sleep(0.5); continue
-
-                is_game = any(g in curr for g in self.cfg.games)
-                v_desk = self.ui_provider('vib_desk')
-                v_game = self.ui_provider('vib_game')
-                murqin = self.ui_provider('murqin')
-                single_mon = self.cfg.settings.get("single_monitor", True)
-
-                if is_game:
-                    if self.current_state != "game":
-                        self.gpu.set_vibrance(v_game, single_mon)
-                        self.mouse.set_game_mode()
-                        
-                        # Sync Murqin Mode from UI to Config if changed, or enforce config
-                        # Since we can't easily read UI state here without a callback, we rely on the UI calling us or us checking a shared state.
-                        # However, the requirement is "remember on next startup".
-                        # So we just need to make sure that when the UI toggles it, it saves to config.
-                        # But here in the loop, we are applying the mode.
-                        
-                        if murqin: 
-                            self.os_mouse.optimize(800, 1600)
-                            if not self.cfg.murqin_mode: # If config says False but UI says True (user toggled it on)
-                                self.cfg.murqin_mode = True
-                        else:
-                            if self.cfg.murqin_mode: # If config says True but UI says False (user toggled it off)
-                                self.cfg.murqin_mode = False
-                        
-                        self.ui_provider('status')("GAME MODE ACTIVE", True)
-                        self.current_state = "game"
-                else:
-                    if self.current_state != "desktop":
-                        self.gpu.set_vibrance(v_desk, single_mon)
-                        self.mouse.set_desktop_mode()
-                        self.os_mouse.reset()
-                        self.ui_provider('status')("DESKTOP MODE", False)
-                        self.current_state = "desktop"
+                self._apply(value)
             except Exception as e:
-                logger.error(f"Automation loop error: {e}")
-            time.sleep(0.5)
+                logger.error(f"{self.name} apply error: {e}")
+            with self._cond:
+                self._last_at = time.monotonic()
+                self.issued += 1
+            _APPLIER_CALLS.inc(applier=self.name, outcome="issued")
 
 class SafetyProtocol:
     def __init__(self, mouse: IMouseBackend, gpu: IGPUBackend, os_mouse: IOSMouseService, ui_provider):
@@ -238,12 +803,17 @@ class SafetyProtocol:
     def execute(self):
         if self._executed: return
         self._executed = True
+        self.restore()
+
+    def restore(self):
+        """Reverts the mouse to desktop mode, pointer speed and vibrance to what they were before. Safe to call repeatedly."""
         print("[Safety] Restoring Defaults...")
-        try: self.os_mouse.reset()
+        try: self.os_mouse.restore()
         except Exception as e: logger.error(f"Safety reset mouse error: {e}")
         try: self.mouse.set_desktop_mode()
         except Exception as e: logger.error(f"Safety reset hardware mouse error: {e}")
         try:
+            # The desktop slider only for displays whose original level could not be read
             d_vib = self.ui('vib_desk') if self.ui else 50
-            self.gpu.set_vibrance(d_vib, primary_only=False)
+            self.gpu.restore(d_vib)
         except Exception as e: logger.error(f"Safety reset GPU error: {e}")
@@ -0,0 +1,234 @@
+# modules/fakes.py
+"""
+In-memory stand-ins for the OS and hardware interfaces.
+
+They let the engine run on machines without the hardware (or without Windows)
+and record what would have been sent. Backends that are given a clock advance
+it by the time the real call would block, so replays see realistic latency.
+"""
+from typing import Any, Dict, List, Optional, Set
+from .hardware import IMouseBackend, IGPUBackend, PointerSpeedService, VXEMouseBackend, CancelToken
+from .process import IForegroundSource, IProcessSource, ForegroundInfo, EMPTY
+from .platforms import IStartupService
+
+class VirtualClock:
+    """Clock that only moves when slept on. Drop-in for the `time` module in AutomationEngine."""
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def monotonic(self) -> float: return self.now
+    def time(self) -> float: return self.now
+    def sleep(self, seconds: float): self.now += max(0.0, seconds)
+
+class FakeForegroundSource(IForegroundSource):
+    """
+    Foreground source whose current window is set by the caller, or scripted:
+    after play(events, clock) it follows a (time, ForegroundInfo) list as the clock advances.
+    """
+    def __init__(self):
+        self.current = EMPTY
+        self.calls = 0
+        self._events: List[tuple] = []
+        self._clock = None
+        self._i = 0
+
+    def set(self, exe: str, path: str = "", window_class: str = "", pid: int = 0):
+        self.current = ForegroundInfo(exe.lower(), path or exe, window_class, pid) if exe else EMPTY
+
+    def play(self, events: List[tuple], clock):
+        self._events, self._clock, self._i = events, clock, 0
+
+    def get_foreground(self) -> ForegroundInfo:
+        self.calls += 1
+        if self._clock:
+            now = self._clock.monotonic()
+            while self._i < len(self._events) and self._events[self._i][0] <= now:
+                self.current = self._events[self._i][1]
+                self._i += 1
+        return self.current
+
+class FakeProcessSource(IProcessSource):
+    """Process list edited by the caller with start()/exit()."""
+    def __init__(self):
+        self.procs: Dict[int, str] = {}  # pid -> image path
+
+    def start(self, pid: int, path: str): self.procs[pid] = path
+    def exit(self, pid: int): self.procs.pop(pid, None)
+    def pids(self) -> Set[int]: return set(self.procs)
+    def image_path(self, pid: int) -> str: return self.procs.get(pid, "")
+
+class _Recorder:
+    def __init__(self, clock=None):
+        self.clock = clock
+        self.writes: List[tuple] = []  # (time, op, args)
+
+    def _record(self, op: str, *args, cost: float = 0.0, token: Optional[CancelToken] = None):
+        if token: token.check()
+        if self.clock: self.clock.sleep(cost)
+        self.writes.append((self.clock.monotonic() if self.clock else 0.0, op, args))
+
+class FakeMouseBackend(_Recorder, IMouseBackend):
+    """
+    Mouse backend that records mode switches. Costs mirror VXEMouseBackend's packet
+    delays, including its checkpoint before the polling-rate packet.
+    """
+    DPI_COST, SETTLE_COST = 4 * 0.02, 0.25
+
+    def __init__(self, clock=None, connected: bool = True):
+        super().__init__(clock)
+        self.connected = connected
+        self.mode = "unknown"
+        self.prepares = 0
+
+    def connect(self) -> bool: return self.connected
+    def prepare(self) -> bool:
+        self.prepares += 1
+        return self.connected
+    def _apply(self, mode: str, token: Optional[CancelToken]):
+        self._record(f"set_{mode}_dpi", cost=self.DPI_COST, token=token)
+        self.mode = f"{mode}_dpi"
+        if self.clock: self.clock.sleep(self.SETTLE_COST)
+        self._record(f"set_{mode}_mode", token=token)
+        self.mode = mode
+
+    def set_game_mode(self, token: Optional[CancelToken] = None): self._apply("game", token)
+    def set_desktop_mode(self, token: Optional[CancelToken] = None): self._apply("desktop", token)
+
+class SimulatedMCU:
+    """
+    hidapi-device stand-in for the VXE receiver MCU, with timing limits, for offline calibration.
+
+    Reports land in a single receive buffer and are committed `min_gap` seconds after
+    they arrive; a report arriving before that replaces the uncommitted one, which is
+    lost. A polling-rate write committed less than `min_settle` after the last DPI table
+    write is ignored (the table is still being flashed). Reports with a bad checksum
+    are ignored. Read requests are answered once committed, in the write layout.
+    `clock` needs monotonic() and sleep(): the time module or a VirtualClock.
+    """
+    def __init__(self, clock=None, min_gap: float = 0.008, min_settle: float = 0.12,
+                 vid: int = VXEMouseBackend.VENDOR_ID, pid: int = VXEMouseBackend.PRODUCT_ID, release: int = 0x0100):
+        import time
+        self.clock = clock or time
+        self.min_gap, self.min_settle = min_gap, min_settle
+        self.info = {"vendor_id": vid, "product_id": pid, "release_number": release}
+        self.memory: Dict[int, bytes] = {}  # Address -> committed data
+        self.writes = self.lost = self.ignored = 0
+        self._pending: Optional[tuple] = None  # (arrival time, report)
+        self._table_at = float("-inf")         # Commit time of the last DPI table write
+        self._replies: List[List[int]] = []
+
+    def _commit(self):
+        if not self._pending or self.clock.monotonic() < self._pending[0] + self.min_gap: return
+        arrived, r = self._pending
+        self._pending, at = None, arrived + self.min_gap
+        if len(r) < 17 or r[-1] != VXEMouseBackend.checksum(r[:-1]):
+            self.ignored += 1
+            return
+        op, addr, length = r[1], r[4], r[5]
+        if op == VXEMouseBackend.WRITE:
+            if addr == VXEMouseBackend.RATE_ADDR and at < self._table_at + self.min_settle:
+                self.ignored += 1
+                return
+            self.memory[addr] = bytes(r[6:6 + length])
+            if addr != VXEMouseBackend.RATE_ADDR: self._table_at = at
+        elif op == VXEMouseBackend.READ:
+            body = bytes([VXEMouseBackend.REPORT_ID, op, 0, 0, addr, length]) + self.memory.get(addr, bytes(length)).ljust(10, b"\0")[:10]
+            self._replies.append(list(body + bytes([VXEMouseBackend.checksum(body)])))
+
+    def write(self, data) -> int:
+        self._commit()
+        if self._pending: self.lost += 1
+        self._pending = (self.clock.monotonic(), bytes(data))
+        self.writes += 1
+        return len(data)
+
+    def read(self, size: int, timeout_ms: int = 0) -> List[int]:
+        self._commit()
+        if not self._replies and timeout_ms:
+            # Block like hid_read_timeout: until the pending report commits, or the timeout
+            wait = self._pending[0] + self.min_gap - self.clock.monotonic() if self._pending else float("inf")
+            self.clock.sleep(max(0.0, min(wait, timeout_ms / 1000)))
+            self._commit()
+        return self._replies.pop(0)[:size] if self._replies else []
+
+    def set_nonblocking(self, flag: int): pass
+    def close(self): pass
+
+class FakeGPUBackend(_Recorder, IGPUBackend):
+    """
+    GPU backend that records vibrance writes. `levels` holds the live level per display;
+    edit it to simulate changes made outside the app. Read-back, skipping and restore
+    follow NvidiaService.
+    """
+    def __init__(self, clock=None, available: bool = True, displays: int = 1, level: int = 50):
+        super().__init__(clock)
+        self._available = available
+        self.level: Optional[int] = None
+        self.levels: List[int] = [level] * displays
+        self.original: Dict[int, int] = {}  # Display -> level before our first write
+        self._written: Dict[int, int] = {}
+        self.prepares = 0
+
+    @property
+    def available(self) -> bool: return self._available
+    def prepare(self) -> bool:
+        self.prepares += 1
+        return self._available
+    def _user_changed(self, i: int) -> bool: return i in self._written and self.levels[i] != self._written[i]
+    def set_vibrance(self, level: int, primary_only: bool, token: Optional[CancelToken] = None):
+        for i in range(1 if primary_only else len(self.levels)):
+            if i not in self.original or self._user_changed(i): self.original[i] = self.levels[i]
+        todo = [i for i in range(1 if primary_only else len(self.levels)) if self.levels[i] != level]
+        if not todo: return
+        self._record("set_vibrance", level, primary_only, token=token)
+        for i in todo: self.levels[i] = self._written[i] = level
+        self.level = level
+    def restore(self, fallback: int = 50):
+        for i, level in self.original.items():
+            if self._user_changed(i) or self.levels[i] == level: continue
+            self._record("restore_vibrance", i, level)
+            self.levels[i] = level
+        self.original.clear()
+        self._written.clear()
+
+class FakeOSMouseService(_Recorder, PointerSpeedService):
+    """
+    Pointer speed service that records speed changes. `speed` is the live speed; set it
+    to simulate the user moving the slider. Bookkeeping is PointerSpeedService's, as
+    for the real services.
+    """
+    def __init__(self, clock=None, default: int = 10):
+        _Recorder.__init__(self, clock)
+        PointerSpeedService.__init__(self, default)
+        self.speed = default
+
+    @property
+    def default(self) -> int: return self._default
+    def _read(self) -> Optional[int]: return self.speed
+    def _write(self, index: int):
+        self._record("set_speed", index)
+        self.speed = self._current = index
+
+class FakeStartup(IStartupService):
+    """Run-at-login registration kept in memory."""
+    def __init__(self): self.registered: Optional[str] = None
+    def get(self) -> Optional[str]: return self.registered
+    def set(self, command: str): self.registered = command
+    def remove(self): self.registered = None
+
+class FakeConfig:
+    """Duck-typed ConfigManager that never touches the disk."""
+    def __init__(self, games: Optional[List[str]] = None, settings: Optional[Dict[str, Any]] = None):
+        self.games: List[str] = list(games or [])
+        self.settings: Dict[str, Any] = {"single_monitor": True, "murqin_mode": False}
+        self.settings.update(settings or {})
+        self.saves = 0
+
+    @property
+    def murqin_mode(self) -> bool: return self.settings.get("murqin_mode", False)
+    @murqin_mode.setter
+    def murqin_mode(self, value: bool):
+        self.settings["murqin_mode"] = value
+        self.save()
+
+    def save(self): self.saves += 1
@@ -1,42 +1,373 @@
 # modules/hardware.py
 import ctypes
-import hid
 import os
+import re
+import json
+import sys
 import struct
+import subprocess
 import time
+import queue
 import logging
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Optional
-from .constants import CMD_HZ_2000, CMD_HZ_1000, SEQ_DPI_1600, SEQ_DPI_800
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+from .constants import DATA_DIR, CMD_HZ_2000, CMD_HZ_1000, SEQ_DPI_1600, SEQ_DPI_800
+from .metrics import METRICS
 
 logger = logging.getLogger(__name__)
 
+_HID_WRITES = METRICS.counter("specific_tool_hid_writes_total", "HID reports written to the mouse receiver.")
+_HID_FAILURES = METRICS.counter("specific_tool_hid_write_failures_total", "HID report writes that raised or returned an error.")
+_NVAPI_CALLS = METRICS.counter("specific_tool_nvapi_calls_total", "NVAPI function calls, by function.")
+_NVAPI_FAILURES = METRICS.counter("specific_tool_nvapi_failures_total", "NVAPI calls that raised or returned a non-zero status, by function.")
+_SPI_CALLS = METRICS.counter("specific_tool_pointer_speed_calls_total", "SystemParametersInfoW calls made for the pointer speed, by action.")
+_SPI_SKIPPED = METRICS.counter("specific_tool_pointer_speed_skipped_total", "Pointer speed changes skipped because the speed already matched.")
+_DVC_SKIPPED = METRICS.counter("specific_tool_vibrance_skipped_total", "Per-display vibrance writes skipped because the display already had the level.")
+_TIMEOUTS = METRICS.counter("specific_tool_backend_timeouts_total", "Backend calls that missed their deadline, by backend and method.")
+_BREAKER_OPENED = METRICS.counter("specific_tool_breaker_opened_total", "Times a backend circuit breaker opened, by backend.")
+_BREAKER_SKIPPED = METRICS.counter("specific_tool_breaker_skipped_total", "Backend operations skipped while the circuit breaker was open, by backend.")
+
+def write_failures() -> int:
+    """Total failed hardware writes (HID + NVAPI) so far; callers diff it around an operation."""
+    return int(_HID_FAILURES.total() + _NVAPI_FAILURES.total())
+
+# --- Cancellation ---
+class TransitionCancelled(Exception):
+    """Raised at a checkpoint when the transition's CancelToken was cancelled."""
+    def __init__(self, superseded_by: Optional[str] = None):
+        super().__init__(f"superseded by {superseded_by}" if superseded_by else "cancelled")
+        self.superseded_by = superseded_by
+
+class CancelToken:
+    """
+    Cooperative cancellation for a profile transition.
+
+    Backends call check() / sleep() at safe points (between packet groups and
+    between backend calls). The token is cancelled either from another thread via
+    cancel(), or by `probe`, which is consulted at checkpoints and returns the new
+    target state when the in-flight one has been superseded.
+    """
+    SLICE = 0.05  # Max time between probes while sleeping
+
+    def __init__(self, probe: Optional[Callable[[], Optional[str]]] = None):
+        self._event = threading.Event()
+        self._probe = probe
+        self.superseded_by: Optional[str] = None
+
+    @property
+    def cancelled(self) -> bool: return self._event.is_set()
+
+    def child(self) -> "CancelToken":
+        """Token cancelled along with this one (seen at its next checkpoint); cancelling it leaves this one alone."""
+        return CancelToken(probe=self.check)
+
+    def cancel(self, superseded_by: Optional[str] = None):
+        if not self._event.is_set():
+            self.superseded_by = superseded_by
+            self._event.set()
+
+    def check(self):
+        """Raises TransitionCancelled if the token was (or, per the probe, should be) cancelled."""
+        if not self._event.is_set() and self._probe:
+            target = self._probe()
+            if target: self.cancel(target)
+        if self._event.is_set(): raise TransitionCancelled(self.superseded_by)
+
+    def sleep(self, seconds: float):
+        """Sleeps up to `seconds`, waking early (with TransitionCancelled) on cancellation."""
+        end = time.monotonic() + seconds
+        while True:
+            self.check()
+            left = end - time.monotonic()
+            if left <= 0: return
+            self._event.wait(min(self.SLICE, left))
+
+def _wait(token: Optional[CancelToken], seconds: float):
+    if token: token.sleep(seconds)
+    else: time.sleep(seconds)
+
+def _check(token: Optional[CancelToken]):
+    if token: token.check()
+
+# --- Deadlines ---
+class BackendTimeout(Exception):
+    """A backend call missed its deadline, or the backend is still stuck in an earlier call."""
+
+class _Job:
+    __slots__ = ("fn", "args", "kw", "done", "result", "error", "late")
+    def __init__(self, fn, args, kw):
+        self.fn, self.args, self.kw = fn, args, kw
+        self.done = threading.Event()
+        self.result = self.error = None
+        self.late = False
+
+class Bounded:
+    """
+    Proxy that runs every method call of `backend` on its own worker thread and
+    waits at most `timeout` seconds for it.
+
+    A call that misses its deadline raises BackendTimeout in the caller but keeps
+    running on the worker: it gets a child of the caller's CancelToken, which is
+    cancelled so the call stops at its next checkpoint while the caller's transition
+    goes on, and its result is discarded whenever it returns. Until then, further
+    calls fail fast instead of queueing behind it. `on_change` is called when the
+    backend gets stuck or recovers. Attribute reads (e.g. `available`) are direct.
+    """
+    def __init__(self, backend, label: str, timeout: float = 2.0, on_change: Optional[Callable[[], None]] = None):
+        self.backend, self.label, self.timeout, self.on_change = backend, label, timeout, on_change
+        self.stuck: Optional[str] = None  # Method still running past its deadline
+        self._jobs: "queue.Queue[_Job]" = queue.Queue()
+        self._lock = threading.Lock()
+        threading.Thread(target=self._run, name=f"{label}-calls", daemon=True).start()
+
+    def __getattr__(self, attr: str) -> Any:
+        value = getattr(self.backend, attr)
+        if not callable(value): return value
+        return lambda *args, **kw: self._call(attr, value, args, kw)
+
+    def _call(self, attr: str, fn, args, kw):
+        if self.stuck: raise BackendTimeout(f"{self.label} is not responding (still in {self.stuck})")
+        args = tuple(a.child() if isinstance(a, CancelToken) else a for a in args)
+        kw = {k: v.child() if isinstance(v, CancelToken) else v for k, v in kw.items()}
+        job = _Job(fn, args, kw)
+        self._jobs.put(job)
+        if not job.done.wait(self.timeout):
+            with self._lock:
+                if not job.done.is_set():
+                    job.late, self.stuck = True, attr
+            if job.late:
+                for a in list(args) + list(kw.values()):
+                    if isinstance(a, CancelToken): a.cancel()
+                _TIMEOUTS.inc(backend=self.label, method=attr)
+                logger.error(f"{self.label}.{attr} did not return within {self.timeout}s")
+                self._notify()
+                raise BackendTimeout(f"{self.label}.{attr} timed out")
+        if job.error: raise job.error
+        return job.result
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            try: job.result = job.fn(*job.args, **job.kw)
+            except Exception as e: job.error = e
+            with self._lock:
+                job.done.set()
+                late, self.stuck = job.late, (None if job.late else self.stuck)
+            if late:
+                logger.warning(f"{self.label} responded again; late result discarded")
+                self._notify()
+
+    def _notify(self):
+        if self.on_change:
+            try: self.on_change()
+            except Exception as e: logger.error(f"{self.label} state callback error: {e}")
+
+# --- Circuit breaker ---
+class CircuitBreaker:
+    """
+    Stops a backend from retrying a failing device on every transition.
+
+    Closed: operations run; `threshold` consecutive failures open the breaker.
+    Open: operations are skipped until the backoff has passed, then it turns
+    half-open. Half-open: the next operation is a probe; success closes the
+    breaker, failure opens it again with the backoff doubled (up to `max_backoff`).
+    trip() opens it at once, for failures that are not transient (device gone).
+
+    Backends call allow() before an operation and success()/failure() after it.
+    `on_change` is called on every state change.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, label: str, threshold: int = 3, backoff: float = 5.0, max_backoff: float = 60.0,
+                 on_change: Optional[Callable[[], None]] = None, clock: Callable[[], float] = time.monotonic):
+        self.label, self.threshold, self.backoff, self.max_backoff = label, threshold, backoff, max_backoff
+        self.on_change, self.clock = on_change, clock
+        self.state = self.CLOSED
+        self.failures = 0  # Consecutive
+        self.retry_at = 0.0
+        self._delay = backoff
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.OPEN:
+                if self.clock() < self.retry_at:
+                    _BREAKER_SKIPPED.inc(backend=self.label)
+                    return False
+                changed = self._set(self.HALF_OPEN)
+            else:
+                changed = False
+        if changed: self._notify()
+        return True
+
+    def success(self):
+        with self._lock:
+            self.failures, self._delay = 0, self.backoff
+            changed = self._set(self.CLOSED)
+        if changed:
+            logger.info(f"{self.label} recovered; circuit closed")
+            self._notify()
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.CLOSED and self.failures < self.threshold: return
+            changed = self._open()
+        if changed: self._notify()
+
+    def trip(self):
+        with self._lock: changed = self._open()
+        if changed: self._notify()
+
+    def _open(self) -> bool:
+        """Opens (or re-opens) with the current backoff. Lock held."""
+        self.retry_at = self.clock() + self._delay
+        if self.state != self.OPEN:
+            _BREAKER_OPENED.inc(backend=self.label)
+            logger.warning(f"{self.label} circuit open after {self.failures} failure(s); next try in {self._delay:.0f}s")
+        self._delay = min(self._delay * 2, self.max_backoff)
+        return self._set(self.OPEN)
+
+    def _set(self, state: str) -> bool:
+        changed, self.state = self.state != state, state
+        return changed
+
+    def _notify(self):
+        if self.on_change:
+            try: self.on_change()
+            except Exception as e: logger.error(f"{self.label} breaker callback error: {e}")
+
 # --- Abstract Interfaces ---
+# Methods that change hardware state take an optional CancelToken and may raise
+# TransitionCancelled at a safe point instead of finishing.
 class IMouseBackend(ABC):
     """Abstract base class for Mouse Hardware Backends."""
+    breaker: Optional[CircuitBreaker] = None  # Set by backends that guard a real device
     @abstractmethod
-    def set_game_mode(self): pass
+    def set_game_mode(self, token: Optional[CancelToken] = None): pass
     @abstractmethod
-    def set_desktop_mode(self): pass
+    def set_desktop_mode(self, token: Optional[CancelToken] = None): pass
     @abstractmethod
     def connect(self) -> bool: pass
+    def prepare(self) -> bool:
+        """Gets ready for a likely transition without changing the mode. Returns False if the device is gone."""
+        return True
 
 class IGPUBackend(ABC):
     """Abstract base class for GPU Hardware Backends."""
+    breaker: Optional[CircuitBreaker] = None
     @abstractmethod
-    def set_vibrance(self, level: int, primary_only: bool): pass
+    def set_vibrance(self, level: int, primary_only: bool, token: Optional[CancelToken] = None): pass
     @property
     @abstractmethod
     def available(self) -> bool: pass
+    def prepare(self) -> bool:
+        """Gets ready for a likely transition without changing the vibrance. Returns `available`."""
+        return self.available
+    def restore(self, fallback: int = 50):
+        """
+        Final restore on stop/exit: every display back to the level it had before we changed it.
+        Backends that cannot read levels back set `fallback` everywhere.
+        """
+        self.set_vibrance(fallback, primary_only=False)
 
 class IOSMouseService(ABC):
     """Abstract base class for OS-level Mouse Settings (Windows Pointer Speed)."""
     @abstractmethod
-    def set_speed(self, index: int): pass
+    def set_speed(self, index: int, token: Optional[CancelToken] = None): pass
     @abstractmethod
-    def reset(self): pass
+    def reset(self, token: Optional[CancelToken] = None): pass
     @abstractmethod
-    def optimize(self, base: int, target: int): pass
+    def optimize(self, base: int, target: int, token: Optional[CancelToken] = None): pass
+    def restore(self):
+        """Final restore on stop/exit. Defaults to reset(); services may also notify the OS here."""
+        self.reset()
+
+class PointerSpeedService(IOSMouseService):
+    """
+    Speed bookkeeping for pointer services that can read the live speed back.
+
+    The speed is re-read before every change. If it is not the one we last left
+    (the user moved the slider, in either mode), the live value becomes the
+    original that reset()/restore() return to. A change to the speed already
+    in place is skipped.
+    """
+    _MAP = {1:0.03125, 2:0.0625, 3:0.125, 4:0.25, 5:0.375, 6:0.5, 7:0.625, 8:0.75, 9:0.875, 10:1.0, 11:1.25, 12:1.5, 13:1.75, 14:2.0, 15:2.25, 16:2.5, 17:2.75, 18:3.0, 19:3.25, 20:3.5}
+    _INDEX = {}  # (base DPI, target DPI) -> nearest speed index, filled below
+
+    def __init__(self, default: int):
+        self._default = self._current = default
+
+    @classmethod
+    def nearest_index(cls, base: int, target: int) -> int:
+        """Speed index whose multiplier best turns `target` DPI into `base` DPI of cursor travel."""
+        key = (base, target)
+        idx = cls._INDEX.get(key)
+        if idx is None:
+            req = (base * cls._MAP.get(10, 1.0)) / target
+            idx = cls._INDEX[key] = min(cls._MAP.keys(), key=lambda k: abs(cls._MAP[k] - req))
+        return idx
+
+    def _read(self) -> Optional[int]:
+        """Live speed (1-20), or None if it cannot be read; then the last written one is trusted."""
+        return None
+
+    @abstractmethod
+    def _write(self, index: int): pass  # Must update self._current
+
+    def _sync(self) -> int:
+        live = self._read()
+        if live is not None and live != self._current:
+            logger.info(f"Pointer speed changed outside the app ({self._current} -> {live}); restoring to {live} from now on")
+            self._default = self._current = live
+        return self._current
+
+    def set_speed(self, index: int, token: Optional[CancelToken] = None):
+        index = max(1, min(20, int(index)))
+        if index == self._sync():
+            _SPI_SKIPPED.inc()
+            return
+        _check(token)
+        self._write(index)
+
+    def reset(self, token: Optional[CancelToken] = None):
+        self._sync()
+        self.set_speed(self._default, token)
+
+    def optimize(self, base, target, token: Optional[CancelToken] = None):
+        self.set_speed(self.nearest_index(base, target), token)
+
+# Precompute the DPI pairs the UI can produce, so optimize() is a dict lookup
+for _b in (400, 800, 1000, 1200, 1600, 2000, 3200):
+    for _t in (400, 800, 1000, 1200, 1600, 2000, 3200):
+        PointerSpeedService.nearest_index(_b, _t)
+
+# --- HID timings ---
+TIMINGS_FILE = os.path.join(DATA_DIR, "hid_timings.json")
+
+class HidTimings(NamedTuple):
+    """Delays in a mode switch. The defaults are the hand-tuned ones; `python -m modules.calibration` measures real ones."""
+    packet_gap: float = 0.02  # After each DPI table packet
+    settle: float = 0.25      # Before the polling-rate packet
+
+def load_timings(key: str, path: str = TIMINGS_FILE) -> Optional[HidTimings]:
+    """Calibrated timings for a device key (vid:pid:firmware), None if it was never calibrated."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            entry = json.load(f).get(key)
+        return HidTimings(float(entry["packet_gap"]), float(entry["settle"])) if entry else None
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+def save_timings(key: str, timings: HidTimings, path: str = TIMINGS_FILE):
+    try:
+        with open(path, encoding="utf-8") as f: data = json.load(f)
+    except (OSError, ValueError):
+        data = {}
+    data[key] = {"packet_gap": timings.packet_gap, "settle": timings.settle, "calibrated": int(time.time())}
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f: json.dump(data, f, indent=2)
 
 # --- Implementations ---
 class VXEMouseBackend(IMouseBackend):
@@ -45,41 +376,122 @@ class VXEMouseBackend(IMouseBackend):
     
     Uses HID (Human Interface Device) commands to communicate directly with the mouse receiver.
     The commands (CMD_HZ_*, SEQ_DPI_*) are reverse-engineered byte sequences that trigger
-    on-board profile switching.
+    on-board profile switching. Works through hidapi on Windows and on Linux (hidraw).
+
+    Report layout: report id 0x08, opcode, 2 zero bytes, address, length, data,
+    checksum in the last byte (0x55 minus the sum of the others). Opcode 0x07
+    writes `length` bytes at `address` (0x00 holds the polling rate, 0x0C.. the
+    DPI table); 0x08 is taken to read them back in the same layout, which only
+    the calibration uses.
+
+    Delays come from DATA_DIR/hid_timings.json when this receiver/firmware was
+    calibrated, otherwise HidTimings' defaults.
     """
     VENDOR_ID, PRODUCT_ID = 0x373B, 0x1040
-    def __init__(self): self.device = None
+    REPORT_ID, WRITE, READ = 0x08, 0x07, 0x08
+    RATE_ADDR = 0x00
+    # Reports pre-encoded as bytes, so a transition does no list -> buffer conversion
+    PACKETS = {
+        "game": ([bytes(p) for p in SEQ_DPI_1600], bytes(CMD_HZ_2000)),
+        "desktop": ([bytes(p) for p in SEQ_DPI_800], bytes(CMD_HZ_1000)),
+    }
+
+    def __init__(self):
+        self.device, self._path = None, None
+        self.key: Optional[str] = None  # vid:pid:firmware of the open receiver
+        self.timings = HidTimings()
+        self.breaker = CircuitBreaker("mouse")
+
+    @staticmethod
+    def checksum(body) -> int: return (0x55 - sum(body)) & 0xFF
+
+    @classmethod
+    def read_request(cls, addr: int, length: int) -> bytes:
+        body = bytes([cls.REPORT_ID, cls.READ, 0, 0, addr, length]) + bytes(10)
+        return body + bytes([cls.checksum(body)])
     
+    @staticmethod
+    def _is_control(d: dict) -> bool:
+        if sys.platform == "win32":
+            path = d['path'].decode('utf-8','ignore').lower()
+            return "mi_01" in path and "col05" in path  # Channel & interface
+        # hidraw exposes one node per interface, covering all of its collections
+        return d.get('interface_number') == 1
+
     def connect(self) -> bool:
         try:
+            import hid
             for d in hid.enumerate(self.VENDOR_ID, self.PRODUCT_ID):
-                path = d['path'].decode('utf-8','ignore').lower()
-                if "mi_01" in path and "col05" in path:  # Channel & interface
+                if self._is_control(d):
                     self.device = hid.device()
                     self.device.open_path(d['path'])
                     self.device.set_nonblocking(1)
+                    self._path = d['path']
+                    self.key = f"{self.VENDOR_ID:04x}:{self.PRODUCT_ID:04x}:{d.get('release_number', 0):04x}"
+                    timings = load_timings(self.key)
+                    if timings and timings != self.timings: logger.info(f"Using calibrated HID timings for {self.key}: {timings}")
+                    self.timings = timings or HidTimings()
+                    self.breaker.success()
                     return True
-            return False
         except Exception as e:
             logger.error(f"VXE Mouse connect error: {e}")
-            return False
+        # No receiver is not going to fix itself on the next Alt-Tab: back off right away
+        self.breaker.trip()
+        return False
 
-    def _send(self, data):
+    def prepare(self) -> bool:
+        """Checks the receiver is still enumerated on the opened path; reopens it if it was replugged."""
+        if not self.breaker.allow(): return False
+        try:
+            import hid
+            if self.device and any(d['path'] == self._path for d in hid.enumerate(self.VENDOR_ID, self.PRODUCT_ID)):
+                return True
+        except Exception as e:
+            logger.error(f"VXE Mouse prepare error: {e}")
+        self._close()
+        return self.connect()
+
+    def _close(self):
         if self.device:
-            try: self.device.write(data)
-            except Exception as e: logger.error(f"VXE Mouse send error: {e}")
+            try: self.device.close()
+            except Exception: pass
+            self.device = None
+
+    def _failed(self):
+        """Counts a failed write. Once the breaker opens the handle is dropped, so the next probe reconnects."""
+        self.breaker.failure()
+        if self.breaker.state == CircuitBreaker.OPEN: self._close()
 
-    def set_game_mode(self):
-        if not self.device: return
-        for p in SEQ_DPI_1600: self._send(p); time.sleep(0.02)
-        time.sleep(0.25)
-        self._send(CMD_HZ_2000)
+    def _send(self, data) -> bool:
+        _HID_WRITES.inc()
+        try:
+            if self.device.write(data) >= 0: return True
+            logger.error("VXE Mouse send error: write returned -1")
+        except Exception as e:
+            logger.error(f"VXE Mouse send error: {e}")
+        _HID_FAILURES.inc()
+        return False
 
-    def set_desktop_mode(self):
-        if not self.device: return
-        for p in SEQ_DPI_800: self._send(p); time.sleep(0.02)
-        time.sleep(0.25)
-        self._send(CMD_HZ_1000)
+    def _apply(self, seq, hz, token: Optional[CancelToken]):
+        # The DPI table is sent as one unit (a half-written table is not a safe stop);
+        # cancellation is honoured before it, during the settle delay and before the rate packet.
+        # A failed write ends the attempt: the rest would fail the same way.
+        if not self.breaker.allow(): return
+        if not self.device and not self.connect(): return  # Probe after the breaker opened: the receiver may be back
+        _check(token)
+        gap, settle = self.timings
+        for p in seq:
+            if not self._send(p): return self._failed()
+            time.sleep(gap)
+        _wait(token, settle)
+        if not self._send(hz): return self._failed()
+        self.breaker.success()
+
+    def set_game_mode(self, token: Optional[CancelToken] = None):
+        self._apply(*self.PACKETS["game"], token)
+
+    def set_desktop_mode(self, token: Optional[CancelToken] = None):
+        self._apply(*self.PACKETS["desktop"], token)
 
 class NvidiaService(IGPUBackend):
     """
@@ -92,9 +504,21 @@ class NvidiaService(IGPUBackend):
     - 0x0150E828: nvapi_Initialize (Initializes the API)
     - 0x9ABDD40D: nvapi_EnumDisplayHandle (Enumerates active displays)
     - 0x172409B4: nvapi_SetDVCLevel (Sets Digital Vibrance Control level)
+    - 0x4085DE45: nvapi_GetDVCInfo (Reads the current level back)
+
+    Levels are read back before writing: displays already at the level are skipped,
+    and the level a display had before our first write is kept for restore(). A level
+    found changed since our last write was set by the user and becomes the original.
     """
+    class DVCInfo(ctypes.Structure):
+        _fields_ = [("version", ctypes.c_uint32), ("current", ctypes.c_int), ("min", ctypes.c_int), ("max", ctypes.c_int)]
+
     def __init__(self):
         self._nvapi, self._handles, self._is_avail = None, [], False
+        self._get_dvc = None
+        self._original: Dict[int, Optional[int]] = {}  # Handle -> raw level before our first write (None: unreadable)
+        self._written: Dict[int, int] = {}             # Handle -> raw level we last wrote
+        self.breaker = CircuitBreaker("gpu")
         self._init_api()
 
     def _init_api(self):
@@ -112,42 +536,196 @@ class NvidiaService(IGPUBackend):
                 get = lambda id, args: ftype(ctypes.c_int, *args)(q_int(id))
                 
                 if get(0x0150E828, [])() == 0: # Init
-                    enum = get(0x9ABDD40D, [ctypes.c_int, ctypes.POINTER(ctypes.c_int)])
+                    self._enum = get(0x9ABDD40D, [ctypes.c_int, ctypes.POINTER(ctypes.c_int)])
                     self._set_dvc = get(0x172409B4, [ctypes.c_int, ctypes.c_int, ctypes.c_int])
-                    for i in range(10):
-                        h = ctypes.c_int(0)
-                        if enum(i, ctypes.byref(h)) == 0: self._handles.append(h)
-                        else: break
+                    self._get_dvc = get(0x4085DE45, [ctypes.c_int, ctypes.c_int, ctypes.POINTER(self.DVCInfo)])
+                    self._handles = self._enum_handles()
                     self._is_avail = True
         except Exception as e:
             logger.warning(f"Nvidia Service init failed: {e}")
 
+    def _enum_handles(self) -> List[ctypes.c_int]:
+        handles = []
+        for i in range(10):
+            h = ctypes.c_int(0)
+            _NVAPI_CALLS.inc(fn="EnumDisplayHandle")
+            if self._enum(i, ctypes.byref(h)) == 0: handles.append(h)
+            else: break
+        return handles
+
+    def prepare(self) -> bool:
+        """Re-enumerates display handles, which go stale when displays are plugged or modes change."""
+        if not self.available or not self.breaker.allow(): return False
+        try:
+            self._handles = self._enum_handles()
+        except Exception as e:
+            _NVAPI_FAILURES.inc(fn="EnumDisplayHandle")
+            logger.error(f"Failed to enumerate displays: {e}")
+            self.breaker.failure()
+        return True
+
     @property
     def available(self) -> bool: return self._is_avail
 
-    def set_vibrance(self, level: int, primary_only: bool):
-        if not self.available: return
-        if level is None: level = 50
+    @staticmethod
+    def _raw(level: int) -> int: return max(-63, min(63, int((level - 50) * 1.26)))
+
+    def _read(self, h: ctypes.c_int) -> Optional[int]:
+        """Raw DVC level of a display, None if the driver does not say."""
+        if not self._get_dvc: return None
+        info = self.DVCInfo(version=ctypes.sizeof(self.DVCInfo) | (1 << 16))
+        _NVAPI_CALLS.inc(fn="GetDVCInfo")
+        if self._get_dvc(h, 0, ctypes.byref(info)) != 0:
+            _NVAPI_FAILURES.inc(fn="GetDVCInfo")
+            return None
+        return info.current
+
+    def _write(self, targets: Callable[[ctypes.c_int, Optional[int]], Optional[int]], handles, token: Optional[CancelToken]):
+        """Writes targets(handle, live raw level) to each display, skipping None and levels already in place."""
         try:
-            val = max(-63, min(63, int((level - 50) * 1.26)))
-            if primary_only and self._handles: self._set_dvc(self._handles[0], 0, val)
-            else:
-                for h in self._handles: self._set_dvc(h, 0, val)
+            failed = 0
+            for h in handles:
+                _check(token)
+                live = self._read(h)
+                val = targets(h, live)
+                if val is None or val == live:
+                    if val is not None: _DVC_SKIPPED.inc()
+                    continue
+                _NVAPI_CALLS.inc(fn="SetDVCLevel")
+                status = self._set_dvc(h, 0, val)
+                if status != 0:
+                    _NVAPI_FAILURES.inc(fn="SetDVCLevel")
+                    failed, bad = failed + 1, status
+                else:
+                    self._written[h.value] = val
+        except TransitionCancelled:
+            raise
         except Exception as e:
+            _NVAPI_FAILURES.inc(fn="SetDVCLevel")
             logger.error(f"Failed to set vibrance: {e}")
+            return self.breaker.failure()
+        if failed:
+            logger.error(f"Failed to set vibrance on {failed} display(s): NVAPI status {bad}")
+            self.breaker.failure()
+        else:
+            self.breaker.success()
 
-class WindowsMouseService(IOSMouseService):
-    _MAP = {1:0.03125, 2:0.0625, 3:0.125, 4:0.25, 5:0.375, 6:0.5, 7:0.625, 8:0.75, 9:0.875, 10:1.0, 11:1.25, 12:1.5, 13:1.75, 14:2.0, 15:2.25, 16:2.5, 17:2.75, 18:3.0, 19:3.25, 20:3.5}
-    def __init__(self):
+    def _user_changed(self, h: ctypes.c_int, live: Optional[int]) -> bool:
+        """True if the display no longer has the level we last wrote to it."""
+        written = self._written.get(h.value)
+        return live is not None and written is not None and live != written
+
+    def set_vibrance(self, level: int, primary_only: bool, token: Optional[CancelToken] = None):
+        if not self.available or not self.breaker.allow(): return
+        if level is None: level = 50
+        val = self._raw(level)
+        def target(h, live):
+            if h.value not in self._original or self._user_changed(h, live):
+                self._original[h.value] = live
+            return val
+        self._write(target, self._handles[:1] if primary_only and self._handles else self._handles, token)
+
+    def restore(self, fallback: int = 50):
+        """Puts back the levels displays had before our first write; a level the user has set since stays."""
+        if not self.available or not self.breaker.allow(): return
+        def target(h, live):
+            if h.value not in self._original or self._user_changed(h, live): return None
+            original = self._original[h.value]
+            return self._raw(fallback) if original is None else original
+        self._write(target, self._handles, None)
+        self._original.clear()
+        self._written.clear()
+
+class WindowsMouseService(PointerSpeedService):
+    """
+    Windows pointer speed (the Mouse Properties speed slider, 1-20).
+
+    By default speeds are applied in-session only (fWinIni = 0): no registry write and
+    no WM_SETTINGCHANGE broadcast to every top-level window, which can hitch a running
+    game. The broadcast happens once, in restore(). With `persist=True` every change is
+    written to the profile and broadcast, as before. The live speed is re-read at
+    every change (see PointerSpeedService).
+    """
+    SPI_GETMOUSESPEED, SPI_SETMOUSESPEED = 0x0070, 0x0071
+    SPIF_UPDATEINIFILE, SPIF_SENDCHANGE = 0x01, 0x02
+
+    def __init__(self, persist: bool = False):
         self._user32 = ctypes.windll.user32
-        self._default = self._get_speed()
+        self.persist = persist
+        super().__init__(self._get_speed())
+        self._dirty = False  # In-session change not yet broadcast
+
     def _get_speed(self) -> int:
         s = ctypes.c_int()
-        self._user32.SystemParametersInfoW(0x0070, 0, ctypes.byref(s), 0)
+        _SPI_CALLS.inc(action="get")
+        self._user32.SystemParametersInfoW(self.SPI_GETMOUSESPEED, 0, ctypes.byref(s), 0)
         return s.value
-    def set_speed(self, index: int):
-        self._user32.SystemParametersInfoW(0x0071, 0, ctypes.c_void_p(max(1, min(20, int(index)))), 0x01 | 0x02)
-    def reset(self): self.set_speed(self._default)
-    def optimize(self, base, target):
-        req = (base * self._MAP.get(10, 1.0)) / target
-        self.set_speed(min(self._MAP.keys(), key=lambda k: abs(self._MAP[k] - req)))
\ No newline at end of file
+
+    def _apply(self, index: int, flags: int):
+        _SPI_CALLS.inc(action="set" if flags else "set_session")
+        self._user32.SystemParametersInfoW(self.SPI_SETMOUSESPEED, 0, ctypes.c_void_p(index), flags)
+        self._current = index
+
+    def _read(self) -> Optional[int]: return self._get_speed() or None
+
+    def _write(self, index: int):
+        if self.persist:
+            self._apply(index, self.SPIF_UPDATEINIFILE | self.SPIF_SENDCHANGE)
+        else:
+            self._apply(index, 0)
+            self._dirty = True
+
+    def restore(self):
+        """Returns to the original speed and broadcasts it once, if anything was changed in-session."""
+        self._sync()
+        if self._current == self._default and not self._dirty: return
+        self._apply(self._default, self.SPIF_SENDCHANGE | (self.SPIF_UPDATEINIFILE if self.persist else 0))
+        self._dirty = False
+
+class XInputPointerService(PointerSpeedService):
+    """
+    Linux/X11 pointer speed via the xinput "Coordinate Transformation Matrix" of every
+    slave pointer. Scaling the matrix scales relative motion exactly (with libinput and
+    evdev alike), so the same 1-20 speed index and multipliers as on Windows apply.
+    Changes last for the X session only. The live speed is read back from the first
+    pointer's matrix (see PointerSpeedService); `default` is used until then.
+    """
+    PROP = "Coordinate Transformation Matrix"
+    _DEVICE = re.compile(r"id=(\d+)\s+\[slave\s+pointer")
+
+    def __init__(self, default: int = 10):
+        super().__init__(default)
+        self._devices: Optional[List[str]] = None
+
+    def _pointers(self) -> List[str]:
+        if self._devices is None:
+            out = subprocess.run(["xinput", "list", "--short"], capture_output=True, text=True, timeout=2).stdout
+            matches = (self._DEVICE.search(line) for line in out.splitlines() if "XTEST" not in line)
+            self._devices = [m.group(1) for m in matches if m]
+        return self._devices
+
+    def _read(self) -> Optional[int]:
+        try:
+            devices = self._pointers()
+            if not devices: return None
+            _SPI_CALLS.inc(action="get")
+            out = subprocess.run(["xinput", "list-props", devices[0]], capture_output=True, text=True, timeout=2).stdout
+        except (OSError, subprocess.SubprocessError):
+            return None
+        for line in out.splitlines():
+            if line.strip().startswith(self.PROP):
+                try: k = float(line.split(":", 1)[1].split(",")[0])
+                except (IndexError, ValueError): return None
+                return min(self._MAP, key=lambda i: abs(self._MAP[i] - k))
+        return None
+
+    def _write(self, index: int):
+        k = self._MAP[index]
+        _SPI_CALLS.inc(action="set_session")
+        try:
+            for dev in self._pointers():
+                subprocess.run(["xinput", "set-prop", dev, self.PROP] + [str(v) for v in (k, 0, 0, 0, k, 0, 0, 0, 1)], timeout=2)
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.error(f"xinput pointer speed error: {e}")
+            return
+        self._current = index
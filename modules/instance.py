@@ -0,0 +1,80 @@
+# modules/instance.py
+"""
+Single-instance guard.
+
+The first instance holds a named mutex (Windows) or an exclusive lock on
+DATA_DIR/instance.lock (elsewhere) for its lifetime; the OS drops either when
+the process dies, so a crash never leaves a stale lock. A second launch hands
+its arguments to the running instance over the control channel and exits. With
+"control_api" off there is no channel to hand off to; it exits straight away.
+
+Imported by main.py before the UI, hardware and NVAPI, so a second launch costs
+only the interpreter start-up and one local round trip.
+"""
+import os
+import sys
+import json
+import time
+from typing import List
+from .constants import APP_NAME, DATA_DIR, CONFIG_FILE
+from .control import ControlError, send_command
+from .platforms import PLATFORM
+
+LOCK_FILE = os.path.join(DATA_DIR, "instance.lock")
+ERROR_ALREADY_EXISTS = 183
+
+class SingleInstance:
+    """Holds the instance lock once acquire() returned True. Keep the object alive."""
+    def __init__(self, name: str = APP_NAME, path: str = LOCK_FILE):
+        self.name, self.path = name, path
+        self._handle = None
+
+    def acquire(self) -> bool:
+        """True if this is the only instance, False if another one holds the lock."""
+        if PLATFORM == "windows":
+            import ctypes
+            from ctypes import wintypes
+            k32 = ctypes.WinDLL('kernel32', use_last_error=True)
+            k32.CreateMutexW.restype = wintypes.HANDLE
+            k32.CreateMutexW.argtypes = [ctypes.c_void_p, wintypes.BOOL, wintypes.LPCWSTR]
+            self._handle = k32.CreateMutexW(None, False, f"Local\\Murqin {self.name}")
+            return bool(self._handle) and ctypes.get_last_error() != ERROR_ALREADY_EXISTS
+        import fcntl
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        f = open(self.path, "a+")
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self._handle = f
+        return True
+
+def _control_enabled(path: str = CONFIG_FILE) -> bool:
+    """The "control_api" setting, read straight from the file (ConfigManager pulls in too much). True if unreadable."""
+    try:
+        with open(path, encoding="utf-8") as f: settings = json.load(f).get("settings", {})
+        return bool(settings.get("control_api", True)) if isinstance(settings, dict) else True
+    except (OSError, ValueError, AttributeError):
+        return True
+
+def hand_off(argv: List[str], wait: float = 2.0) -> int:
+    """
+    Sends `argv` to the running instance with the "show" command.
+
+    The running instance may still be starting up (lock taken, control channel not
+    yet listening), so this retries for up to `wait` seconds. Returns an exit code.
+    """
+    if not _control_enabled():
+        print(f"{APP_NAME} is already running (control_api is disabled, so it cannot be brought to the front)", file=sys.stderr)
+        return 1
+    deadline = time.monotonic() + wait
+    while True:
+        try:
+            send_command("show", timeout=1.0, argv=argv)
+            return 0
+        except (ControlError, OSError) as e:
+            if time.monotonic() >= deadline:
+                print(f"{APP_NAME} is already running ({e})", file=sys.stderr)
+                return 1
+            time.sleep(0.05)
@@ -0,0 +1,254 @@
+# modules/journal.py
+"""
+Append-only binary journal of profile transitions, for usage analytics.
+
+Each transition is one fixed-size record appended to a memory-mapped segment
+file in DATA_DIR/journal. Writing one is a struct pack into the map plus a
+counter update; the OS writes the pages back. Executable names are interned in
+names.txt (one per line, id = line number) so a record stays 24 bytes.
+
+Segment layout::
+
+    header  <4sHHQ   magic "STJ1", version, record size, records written
+    record  <dIBBBBfI  unix time, exe id, source, target, outcome, reserved,
+                       latency (s), failed hardware writes
+
+A full segment is left as is and a new one started; the oldest segments beyond
+`max_segments` are deleted. Readers stream records segment by segment.
+
+CLI: python -m modules.journal [--days N] [--top N]
+"""
+import os
+import sys
+import glob
+import mmap
+import time
+import struct
+import bisect
+import argparse
+import logging
+from collections import defaultdict
+from typing import Dict, Iterator, List, NamedTuple, Optional
+from .constants import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_DIR = os.path.join(DATA_DIR, "journal")
+MAGIC, VERSION = b"STJ1", 1
+HEADER = struct.Struct("<4sHHQ")
+RECORD = struct.Struct("<dIBBBBfI")
+READ_CHUNK = RECORD.size * 4096
+
+STATES = ("unknown", "desktop", "game")
+OUTCOMES = ("ok", "cancelled", "failed")
+
+class Record(NamedTuple):
+    time: float
+    exe: str
+    source: str
+    target: str
+    outcome: str
+    latency: float
+    failures: int
+
+class Journal:
+    """
+    Writer side. Not thread-safe: the AutomationEngine writes from its own thread only.
+
+    Args:
+        directory: Where segments and the name table live.
+        segment_records: Records per segment file (65536 records = 1.5 MiB).
+        max_segments: Segments kept; older ones are deleted on rotation.
+    """
+    def __init__(self, directory: str = JOURNAL_DIR, segment_records: int = 65536, max_segments: int = 50):
+        self.directory, self.segment_records, self.max_segments = directory, segment_records, max_segments
+        os.makedirs(directory, exist_ok=True)
+        self._ids: Dict[str, int] = {name: i for i, name in enumerate(read_names(directory))}
+        self._names = open(os.path.join(directory, "names.txt"), "a", encoding="utf-8")
+        self._file = self._map = None
+        self._count = 0
+        segments = _segments(directory)
+        if not (segments and self._open(segments[-1])): self._rotate()
+
+    def _open(self, path: str) -> bool:
+        """Continues appending to an existing segment, if it is valid and has room."""
+        try:
+            f = open(path, "r+b")
+            mm = mmap.mmap(f.fileno(), 0)
+        except (OSError, ValueError):
+            return False
+        if len(mm) < HEADER.size:  # Truncated, e.g. by a crash right after rotation
+            mm.close(); f.close()
+            return False
+        magic, version, size, count = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or version != VERSION or size != RECORD.size or count >= (len(mm) - HEADER.size) // RECORD.size:
+            mm.close(); f.close()
+            return False
+        self._file, self._map, self._count = f, mm, count
+        return True
+
+    def _rotate(self):
+        self._close_segment()
+        segments = _segments(self.directory)
+        seq = int(os.path.basename(segments[-1])[8:-4]) + 1 if segments else 1
+        path = os.path.join(self.directory, f"journal-{seq:06d}.bin")
+        with open(path, "wb") as f:
+            f.truncate(HEADER.size + self.segment_records * RECORD.size)
+            f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, 0))
+        self._open(path)
+        for old in _segments(self.directory)[:-self.max_segments]:
+            try: os.remove(old)
+            except OSError: pass
+
+    def _intern(self, exe: str) -> int:
+        i = self._ids.get(exe)
+        if i is None:
+            i = self._ids[exe] = len(self._ids)
+            self._names.write(exe.replace("\n", " ") + "\n")
+            self._names.flush()  # Before any record refers to it
+        return i
+
+    def record(self, exe: str, source: str, target: str, outcome: str = "ok", latency: float = 0.0, failures: int = 0):
+        if self._map is None: return
+        if self._count >= self.segment_records: self._rotate()
+        RECORD.pack_into(self._map, HEADER.size + self._count * RECORD.size,
+                         time.time(), self._intern(exe), STATES.index(source), STATES.index(target),
+                         OUTCOMES.index(outcome), 0, latency, failures)
+        self._count += 1
+        # The count goes in after the record, so a reader never sees a half-written one
+        struct.pack_into("<Q", self._map, 8, self._count)
+
+    def _close_segment(self):
+        if self._map is not None:
+            self._map.flush()
+            self._map.close()
+            self._file.close()
+            self._map = self._file = None
+
+    def close(self):
+        self._close_segment()
+        self._names.close()
+
+# --- Reader side ---
+def _segments(directory: str) -> List[str]:
+    """Segment files, oldest first (journal-000001.bin, journal-000002.bin, ...)."""
+    return sorted(glob.glob(os.path.join(directory, "journal-[0-9][0-9][0-9][0-9][0-9][0-9].bin")))
+
+def read_names(directory: str = JOURNAL_DIR) -> List[str]:
+    try:
+        with open(os.path.join(directory, "names.txt"), encoding="utf-8") as f:
+            return [line.rstrip("\n") for line in f]
+    except FileNotFoundError:
+        return []
+
+def read(directory: str = JOURNAL_DIR, since: Optional[float] = None) -> Iterator[Record]:
+    """Streams all records in time order, optionally only those at or after unix time `since`."""
+    names = read_names(directory)
+    for path in _segments(directory):
+        try:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if len(mm) < HEADER.size: continue
+                magic, version, size, count = HEADER.unpack_from(mm, 0)
+                if magic != MAGIC or version != VERSION or size != RECORD.size: continue
+                count = min(count, (len(mm) - HEADER.size) // RECORD.size)  # A torn segment holds fewer than its header says
+                # Whole segment older than `since`: skip it by its last record
+                if since is not None and count and RECORD.unpack_from(mm, HEADER.size + (count - 1) * RECORD.size)[0] < since: continue
+                end = HEADER.size + count * RECORD.size
+                # Chunked copies keep memory flat and leave no buffer exported when the caller stops early
+                for start in range(HEADER.size, end, READ_CHUNK):
+                    for t, exe, src, dst, outcome, _, latency, failures in RECORD.iter_unpack(mm[start:min(end, start + READ_CHUNK)]):
+                        if since is not None and t < since: continue
+                        # A name written after `names` was read belongs to a record appended meanwhile
+                        name = names[exe] if exe < len(names) else f"#{exe}"
+                        yield Record(t, name, STATES[src], STATES[dst], OUTCOMES[outcome], latency, failures)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping journal segment {path}: {e}")
+
+class _Histogram:
+    """
+    Fixed log-spaced buckets, each `growth` times wider than the last (like metrics.Histogram,
+    plus percentiles). Memory stays constant however many values are added; a percentile
+    is the upper bound of its bucket, so within `growth` of the exact value.
+    """
+    def __init__(self, low: float, high: float, growth: float = 1.1):
+        self.bounds: List[float] = []
+        b = low
+        while b < high:
+            self.bounds.append(b)
+            b *= growth
+        self.counts = [0] * (len(self.bounds) + 1)  # Last one: above `high`
+        self.count, self.sum, self.max = 0, 0.0, 0.0
+
+    def add(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> float:
+        if not self.count: return 0.0
+        rank, acc = min(self.count - 1, int(q * self.count)), 0
+        for i, c in enumerate(self.counts):
+            acc += c
+            if acc > rank: return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+class JournalSummary:
+    """Aggregates over a record stream: switch rate, game sessions and hardware write failures. Memory does not grow with the stream."""
+    def __init__(self):
+        self.first = self.last = None
+        self.transitions = self.cancelled = self.failed = self.write_failures = 0
+        self.latencies = _Histogram(0.001, 60.0)                # Transition latency (s)
+        self.sessions = _Histogram(1.0, 7 * 86400.0)            # Game session durations (s)
+        self.by_game: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0])  # exe -> [sessions, seconds]
+
+    def feed(self, records: Iterator[Record]) -> "JournalSummary":
+        open_session = None  # (start time, exe)
+        for r in records:
+            if self.first is None: self.first = r.time
+            self.last = r.time
+            self.write_failures += r.failures
+            if r.outcome == "cancelled": self.cancelled += 1; continue
+            if r.outcome == "failed": self.failed += 1; continue
+            self.transitions += 1
+            self.latencies.add(r.latency)
+            if open_session and r.target != "game":
+                self._close(open_session, r.time)
+                open_session = None
+            if r.target == "game" and open_session is None: open_session = (r.time, r.exe)
+        if open_session: self._close(open_session, self.last)
+        return self
+
+    def _close(self, session, end: float):
+        start, exe = session
+        self.sessions.add(end - start)
+        g = self.by_game[exe]
+        g[0] += 1
+        g[1] += end - start
+
+    def text(self, top: int = 10) -> str:
+        if self.first is None: return "Journal is empty."
+        days = max((self.last - self.first) / 86400, 1 / 24)
+        lines = [
+            f"Period         : {time.strftime('%Y-%m-%d %H:%M', time.localtime(self.first))} .. {time.strftime('%Y-%m-%d %H:%M', time.localtime(self.last))}",
+            f"Transitions    : {self.transitions} ({self.transitions / days:.1f}/day), {self.cancelled} cancelled, {self.failed} failed",
+            f"Latency (ms)   : p50 {self.latencies.percentile(0.5) * 1000:.0f} / p95 {self.latencies.percentile(0.95) * 1000:.0f}",
+            f"Write failures : {self.write_failures}",
+            f"Game sessions  : {self.sessions.count}, {self.sessions.sum / 3600:.1f}h total, median {self.sessions.percentile(0.5) / 60:.1f} min, p95 {self.sessions.percentile(0.95) / 60:.1f} min",
+        ]
+        for exe, (n, secs) in sorted(self.by_game.items(), key=lambda kv: -kv[1][1])[:top]:
+            lines.append(f"  {exe:<30} {n:>5} sessions {secs / 3600:>8.1f}h")
+        return "\n".join(lines)
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m modules.journal", description="Summarise the transition journal.")
+    ap.add_argument("--dir", default=JOURNAL_DIR)
+    ap.add_argument("--days", type=float, help="Only the last N days")
+    ap.add_argument("--top", type=int, default=10, help="Games to list")
+    args = ap.parse_args(argv)
+    since = time.time() - args.days * 86400 if args.days else None
+    print(JournalSummary().feed(read(args.dir, since)).text(args.top))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
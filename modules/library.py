@@ -0,0 +1,266 @@
+# modules/library.py
+"""
+Game-library import from local launcher manifests.
+
+- Steam: <root>/steamapps/libraryfolders.vdf lists the library folders; each
+  holds steamapps/appmanifest_<id>.acf (name, installdir). The executable is
+  picked from steamapps/common/<installdir>.
+- Epic: <ProgramData>/Epic/EpicGamesLauncher/Data/Manifests/*.item (JSON), which
+  names the launch executable directly.
+
+Results are cached per manifest in DATA_DIR/library.json, keyed by the manifest's
+mtime and size, so a rescan only stats the manifests and re-reads the changed
+ones. Roots and the index path are injectable, for running against fixture trees.
+
+CLI: python -m modules.library [--steam DIR ...] [--epic DIR ...] [--index FILE]
+"""
+import os
+import re
+import sys
+import glob
+import json
+import time
+import argparse
+import logging
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+from .constants import DATA_DIR
+from .platforms import PLATFORM
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = os.path.join(DATA_DIR, "library.json")
+INDEX_VERSION = 2  # Bumped when the executable selection changes, to rebuild cached entries
+MAX_DEPTH = 4  # Unreal games keep the real binary in <Game>/Binaries/Win64
+# Installers, crash reporters, anti-cheat services and the like, never the game window. Matched
+# against the whole lower-case stem, so e.g. "servergame" or "reporter_game" are kept.
+_NOT_GAME = re.compile(
+    r"(unins\d*|uninstall\w*|setup(_?x(64|86))?|install(er)?|vc_?redist\w*|dxsetup|dxwebsetup|dotnetfx\w*|"
+    r"ue[45]?prereq\w*|prereq\w*|\w*crash(handler|reporter|reportclient)\w*|crashpad_handler|\w*errorreporter|"
+    r"easyanticheat\w*|eac(launcher)?|be_?service\w*|battleye\w*|cefprocess|touchup|cleanup|updater?|\w*dedicatedserver\w*)")
+# Steam tools installed like games: Steamworks Common Redistributables, SteamVR, Linux runtimes, Proton
+STEAM_TOOLS = {228980, 250820, 1070560, 1391110, 1628350}
+_STEAM_TOOL = re.compile(r"(proton\b|steam linux runtime|steamlinuxruntime|steamworks (common|shared)|steamvr\b)", re.I)
+_SKIP_DIRS = {"_commonredist", "redist", "redistributables", "directx", "support", "__installer", "engine"}
+
+class LibraryGame(NamedTuple):
+    launcher: str
+    name: str
+    exe: str   # Lower-case image name, as ConfigManager.games stores it
+    path: str
+
+# --- Valve KeyValues (.vdf / .acf) ---
+_VDF_TOKEN = re.compile(r'"((?:[^"\\]|\\.)*)"|([{}])|//[^\n]*|([^\s{}"]+)')
+_VDF_ESCAPES = {"n": "\n", "t": "\t", "\\": "\\", '"': '"'}
+
+def parse_vdf(text: str) -> dict:
+    """Parses KeyValues text into nested dicts. Keys are lower-cased; duplicates keep the last value."""
+    root: dict = {}
+    stack, key = [root], None
+    for m in _VDF_TOKEN.finditer(text):
+        quoted, brace, bare = m.groups()
+        if brace == "{":
+            child = {}
+            if key is not None: stack[-1][key] = child
+            stack.append(child)
+            key = None
+        elif brace == "}":
+            if len(stack) > 1: stack.pop()
+            key = None
+        elif quoted is not None or bare is not None:
+            tok = re.sub(r"\\(.)", lambda e: _VDF_ESCAPES.get(e.group(1), e.group(0)), quoted) if quoted is not None else bare
+            if key is None: key = tok.lower()
+            else:
+                stack[-1][key] = tok
+                key = None
+    return root
+
+# --- Executable selection ---
+def _norm(s: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", s.lower())
+
+def _candidates(directory: str, depth: int = 0) -> Iterator[Tuple[str, int, int]]:
+    """(path, depth, size) of files that could be the game binary."""
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return
+    for e in entries:
+        try:
+            if e.is_dir(follow_symlinks=False):
+                if depth < MAX_DEPTH and e.name.lower() not in _SKIP_DIRS: yield from _candidates(e.path, depth + 1)
+                continue
+            name = e.name.lower()
+            stem, ext = os.path.splitext(name)
+            if _NOT_GAME.fullmatch(stem): continue
+            if ext == ".exe" or (PLATFORM != "windows" and ext in ("", ".x86_64", ".x86") and e.stat().st_mode & 0o111):
+                yield e.path, depth, e.stat().st_size
+        except OSError:
+            continue
+
+def find_executable(directory: str, *hints: str) -> Optional[str]:
+    """
+    Best guess at a game's binary inside its install directory: a *-Shipping build
+    first, then names resembling `hints` (the title / folder), shallower and larger
+    files breaking ties.
+    """
+    keys = [k for k in map(_norm, hints) if k]
+    def score(c):
+        path, depth, size = c
+        stem = _norm(os.path.splitext(os.path.basename(path))[0])
+        named = any(k in stem or (stem and stem in k) for k in keys)
+        return ("shipping" in stem, named, -depth, size)
+    best = max(_candidates(directory), key=score, default=None)
+    return best[0] if best else None
+
+# --- Launcher roots ---
+def default_steam_roots() -> List[str]:
+    if PLATFORM == "windows":
+        roots = []
+        try:
+            import winreg
+            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Software\Valve\Steam")
+            try: roots.append(os.path.normpath(winreg.QueryValueEx(key, "SteamPath")[0]))
+            finally: winreg.CloseKey(key)
+        except OSError:
+            pass
+        roots.append(os.path.join(os.environ.get("ProgramFiles(x86)", r"C:\Program Files (x86)"), "Steam"))
+        return roots
+    home = os.path.expanduser("~")
+    return [os.path.join(home, ".steam", "steam"), os.path.join(home, ".local", "share", "Steam"),
+            os.path.join(home, ".var", "app", "com.valvesoftware.Steam", ".local", "share", "Steam")]
+
+def default_epic_dirs() -> List[str]:
+    if PLATFORM != "windows": return []
+    return [os.path.join(os.environ.get("ProgramData", r"C:\ProgramData"), "Epic", "EpicGamesLauncher", "Data", "Manifests")]
+
+def steam_libraries(root: str) -> List[str]:
+    """Library folders of a Steam install, the install itself included."""
+    libs = [root]
+    try:
+        with open(os.path.join(root, "steamapps", "libraryfolders.vdf"), encoding="utf-8", errors="replace") as f:
+            folders = parse_vdf(f.read()).get("libraryfolders", {})
+    except OSError:
+        return libs
+    for k, v in folders.items():
+        # Current format: "0" { "path" "..." }; old one: "1" "D:\\Games\\Steam"
+        path = v.get("path") if isinstance(v, dict) else v if k.isdigit() else None
+        if path: libs.append(path)
+    return libs
+
+# --- Manifest readers ---
+def read_steam_manifest(path: str) -> Optional[LibraryGame]:
+    with open(path, encoding="utf-8", errors="replace") as f:
+        app = parse_vdf(f.read()).get("appstate", {})
+    name, installdir = app.get("name", ""), app.get("installdir", "")
+    if not installdir: return None
+    if (app.get("appid", "").isdigit() and int(app["appid"]) in STEAM_TOOLS) or _STEAM_TOOL.match(name) or _STEAM_TOOL.match(installdir):
+        logger.debug(f"Skipping Steam tool {name or installdir}")
+        return None
+    exe = find_executable(os.path.join(os.path.dirname(path), "common", installdir), name, installdir)
+    if not exe:
+        logger.info(f"No game executable found for {name or installdir} in {installdir}")
+        return None
+    return LibraryGame("steam", name or installdir, os.path.basename(exe).lower(), exe)
+
+def read_epic_manifest(path: str) -> Optional[LibraryGame]:
+    with open(path, encoding="utf-8") as f:
+        item = json.load(f)
+    launch = item.get("LaunchExecutable")
+    if not launch or item.get("bIsIncompleteInstall"): return None
+    exe = os.path.join(item.get("InstallLocation", ""), launch)
+    return LibraryGame("epic", item.get("DisplayName", ""), os.path.basename(launch.replace("\\", "/")).lower(), exe)
+
+class LibraryScanner:
+    """
+    Scans launcher manifests into LibraryGame entries, reusing the on-disk index
+    for manifests whose mtime and size are unchanged.
+
+    Args:
+        steam_roots: Steam install directories (default: the usual locations).
+        epic_dirs: Epic manifest directories (default: the usual location).
+        index_path: Where the index is kept; None keeps it in memory only.
+    """
+    READERS = {"steam": read_steam_manifest, "epic": read_epic_manifest}
+
+    def __init__(self, steam_roots: Optional[List[str]] = None, epic_dirs: Optional[List[str]] = None,
+                 index_path: Optional[str] = INDEX_FILE):
+        self.steam_roots = default_steam_roots() if steam_roots is None else steam_roots
+        self.epic_dirs = default_epic_dirs() if epic_dirs is None else epic_dirs
+        self.index_path = index_path
+        self._index: Dict[str, dict] = self._load()
+        self.parsed = self.reused = 0  # Manifests read / taken from the index by the last scan()
+
+    def _load(self) -> Dict[str, dict]:
+        if not self.index_path: return {}
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                data = json.load(f)
+            return data["manifests"] if data.get("version") == INDEX_VERSION else {}
+        except (OSError, ValueError, KeyError, AttributeError):
+            return {}
+
+    def _save(self):
+        if not self.index_path: return
+        os.makedirs(os.path.dirname(os.path.abspath(self.index_path)), exist_ok=True)
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "manifests": self._index}, f)
+        os.replace(tmp, self.index_path)
+
+    def manifests(self) -> Iterator[Tuple[str, str]]:
+        """(launcher, manifest path) for every manifest under the configured roots."""
+        seen = set()
+        for root in self.steam_roots:
+            for lib in steam_libraries(root):
+                apps = os.path.realpath(os.path.join(lib, "steamapps"))
+                if apps in seen: continue  # ~/.steam/steam is usually a link to ~/.local/share/Steam
+                seen.add(apps)
+                for p in glob.glob(os.path.join(glob.escape(apps), "appmanifest_*.acf")): yield "steam", p
+        for d in self.epic_dirs:
+            for p in glob.glob(os.path.join(glob.escape(d), "*.item")): yield "epic", p
+
+    def scan(self) -> List[LibraryGame]:
+        """All installed games found, sorted by name. Updates the index on disk if anything changed."""
+        index, games = {}, []
+        self.parsed = self.reused = 0
+        for launcher, path in self.manifests():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entry = self._index.get(path)
+            if entry and entry["mtime"] == st.st_mtime_ns and entry["size"] == st.st_size:
+                self.reused += 1
+            else:
+                self.parsed += 1
+                try:
+                    game = self.READERS[launcher](path)
+                except (OSError, ValueError, UnicodeDecodeError) as e:
+                    logger.warning(f"Skipping manifest {path}: {e}")
+                    game = None
+                entry = {"mtime": st.st_mtime_ns, "size": st.st_size, "game": list(game) if game else None}
+            index[path] = entry
+            if entry["game"]: games.append(LibraryGame(*entry["game"]))
+        changed = index != self._index
+        self._index = index
+        if changed:
+            try: self._save()
+            except OSError as e: logger.error(f"Failed to save library index: {e}")
+        return sorted(games, key=lambda g: g.name.lower())
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m modules.library", description="List games found in launcher manifests.")
+    ap.add_argument("--steam", action="append", help="Steam install directory (repeatable)")
+    ap.add_argument("--epic", action="append", help="Epic manifest directory (repeatable)")
+    ap.add_argument("--index", default=INDEX_FILE, help="Index file ('' for none)")
+    args = ap.parse_args(argv)
+    scanner = LibraryScanner(args.steam, args.epic, args.index or None)
+    t0 = time.perf_counter()
+    games = scanner.scan()
+    ms = (time.perf_counter() - t0) * 1000
+    for g in games: print(f"{g.launcher:<6} {g.exe:<32} {g.name}")
+    print(f"{len(games)} games, {scanner.parsed} manifests read, {scanner.reused} from the index, {ms:.1f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
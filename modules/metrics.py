@@ -0,0 +1,194 @@
+# modules/metrics.py
+"""
+Minimal in-process metrics with a Prometheus text exposition endpoint.
+
+Counters, gauges and histograms are registered on the module-level METRICS
+registry by the modules that own them. `MetricsServer` serves the registry on
+http://127.0.0.1:<port>/metrics when enabled via the "metrics_port" setting.
+"""
+import threading
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _fmt_labels(key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    items = list(key) + list(extra)
+    if not items: return ""
+    esc = lambda v: v.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in items) + "}"
+
+def _fmt_value(v: float) -> str:
+    if v == float("inf"): return "+Inf"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+class _Metric:
+    kind = ""
+    def __init__(self, name: str, doc: str):
+        self.name, self.doc = name, doc
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]: return []
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+    kind = "counter"
+    def __init__(self, name: str, doc: str):
+        super().__init__(name, doc)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        k = _key(labels)
+        with self._lock: self._values[k] = self._values.get(k, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock: return self._values.get(_key(labels), 0)
+
+    def total(self) -> float:
+        """Sum over all label sets."""
+        with self._lock: return sum(self._values.values())
+
+    def _samples(self):
+        with self._lock: items = list(self._values.items())
+        return [f"{self.name}{_fmt_labels(k)} {_fmt_value(v)}" for k, v in items]
+
+class Gauge(_Metric):
+    """Value that can go up and down, or is read from a callback at scrape time."""
+    kind = "gauge"
+    def __init__(self, name: str, doc: str, fn: Optional[Callable[[], float]] = None):
+        super().__init__(name, doc)
+        self._values: Dict[LabelKey, float] = {}
+        self.fn = fn
+
+    def set(self, value: float, **labels):
+        with self._lock: self._values[_key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        k = _key(labels)
+        with self._lock: self._values[k] = self._values.get(k, 0) + amount
+
+    def dec(self, amount: float = 1, **labels): self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        if self.fn: return self.fn()
+        with self._lock: return self._values.get(_key(labels), 0)
+
+    def _samples(self):
+        if self.fn:
+            try: return [f"{self.name} {_fmt_value(self.fn())}"]
+            except Exception: return []
+        with self._lock: items = list(self._values.items())
+        return [f"{self.name}{_fmt_labels(k)} {_fmt_value(v)}" for k, v in items]
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed upper bounds."""
+    kind = "histogram"
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    def __init__(self, name: str, doc: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, doc)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series: Dict[LabelKey, list] = {}  # key -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        k = _key(labels)
+        with self._lock:
+            s = self._series.get(k)
+            if s is None: s = self._series[k] = [0] * len(self.buckets) + [0.0, 0]
+            for i, b in enumerate(self.buckets):
+                if value <= b: s[i] += 1; break
+            s[-2] += value
+            s[-1] += 1
+
+    def count(self, **labels) -> int:
+        with self._lock: return self._series.get(_key(labels), [0])[-1]
+
+    def _samples(self):
+        with self._lock: items = [(k, list(s)) for k, s in self._series.items()]
+        out = []
+        for k, s in items:
+            acc = 0
+            for b, c in zip(self.buckets, s):
+                acc += c
+                out.append(f"{self.name}_bucket{_fmt_labels(k, [('le', _fmt_value(b))])} {acc}")
+            out.append(f"{self.name}_sum{_fmt_labels(k)} {_fmt_value(s[-2])}")
+            out.append(f"{self.name}_count{_fmt_labels(k)} {s[-1]}")
+        return out
+
+class Registry:
+    """Named collection of metrics. Registering an existing name returns the existing metric."""
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, *args, **kw):
+        with self._lock:
+            m = self._metrics.get(name)
+            if m is None: m = self._metrics[name] = cls(name, *args, **kw)
+            return m
+
+    def counter(self, name: str, doc: str) -> Counter: return self._get(Counter, name, doc)
+    def gauge(self, name: str, doc: str, fn: Optional[Callable[[], float]] = None) -> Gauge:
+        g = self._get(Gauge, name, doc)
+        if fn: g.fn = fn
+        return g
+    def histogram(self, name: str, doc: str, buckets: Sequence[float] = Histogram.DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, doc, buckets)
+
+    def render(self) -> str:
+        with self._lock: metrics = list(self._metrics.values())
+        return "\n".join(line for m in metrics for line in m.render()) + "\n"
+
+METRICS = Registry()
+
+class MetricsServer:
+    """
+    Serves a Registry in Prometheus text format on 127.0.0.1 only.
+
+    Runs a ThreadingHTTPServer on a daemon thread; port 0 picks a free port.
+    """
+    def __init__(self, registry: Registry = METRICS, port: int = 9464):
+        self.registry, self.port = registry, port
+        self._httpd: Optional[ThreadingHTTPServer] = None
+
+    def start(self) -> bool:
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404); return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, fmt, *args): pass  # Scrapes are not worth a log line
+
+        try:
+            self._httpd = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+            self._httpd.daemon_threads = True
+            self.port = self._httpd.server_address[1]
+            threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+            logger.info(f"Metrics endpoint listening on http://127.0.0.1:{self.port}/metrics")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to start metrics endpoint: {e}")
+            return False
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
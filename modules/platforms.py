@@ -0,0 +1,134 @@
+# modules/platforms.py
+"""
+Runtime platform selection for everything that is OS specific.
+
+The platform comes from the SPECIFIC_TOOL_PLATFORM environment variable
+("windows", "linux" or "fake") and defaults to the one we run on. The factories
+below hand out the matching foreground/process sources, startup registration and
+hardware services; OS modules (winreg, libX11, hidapi) are only imported by the
+implementation that needs them, so the engine imports anywhere.
+
+"fake" runs on the in-memory stand-ins from modules.fakes and keeps its data in
+a temporary directory, for CI and benchmarking.
+"""
+import os
+import sys
+import subprocess
+import tempfile
+from abc import ABC, abstractmethod
+from typing import Optional
+
+PLATFORM = os.environ.get("SPECIFIC_TOOL_PLATFORM") or ("windows" if sys.platform == "win32" else "linux")
+
+def data_dir(app_name: str) -> str:
+    """%APPDATA%\\Murqin\\<app> on Windows, $XDG_DATA_HOME/murqin/<app> on Linux."""
+    if PLATFORM == "fake":
+        return os.path.join(tempfile.gettempdir(), "murqin-fake", app_name)
+    if PLATFORM == "windows":
+        return os.path.join(os.getenv('APPDATA'), "Murqin", app_name)
+    base = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "murqin", app_name)
+
+def open_folder(path: str):
+    """Opens `path` in the desktop file manager."""
+    if PLATFORM == "windows": os.startfile(path)
+    else: subprocess.Popen(["xdg-open", path])
+
+# --- Startup registration ---
+class IStartupService(ABC):
+    """Abstract base class for run-at-login registration."""
+    @abstractmethod
+    def get(self) -> Optional[str]: pass  # The registered command line, or None
+    @abstractmethod
+    def set(self, command: str): pass
+    @abstractmethod
+    def remove(self): pass
+    def command(self, target: str) -> str:
+        """Command line that starts `target` (the exe, or main.py when run from source)."""
+        return f'"{target}"'
+
+class WindowsStartup(IStartupService):
+    """HKCU\\...\\Run value named after the app."""
+    RUN_KEY = r"Software\Microsoft\Windows\CurrentVersion\Run"
+
+    def __init__(self, app_name: str): self.app_name = app_name
+
+    def get(self) -> Optional[str]:
+        import winreg
+        key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, self.RUN_KEY, 0, winreg.KEY_READ)
+        try: return winreg.QueryValueEx(key, self.app_name)[0]
+        finally: winreg.CloseKey(key)
+
+    def set(self, command: str):
+        import winreg
+        key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, self.RUN_KEY, 0, winreg.KEY_ALL_ACCESS)
+        try: winreg.SetValueEx(key, self.app_name, 0, winreg.REG_SZ, command)
+        finally: winreg.CloseKey(key)
+
+    def remove(self):
+        import winreg
+        key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, self.RUN_KEY, 0, winreg.KEY_SET_VALUE)
+        try: winreg.DeleteValue(key, self.app_name)
+        except FileNotFoundError: pass  # Not registered
+        finally: winreg.CloseKey(key)
+
+class LinuxStartup(IStartupService):
+    """XDG autostart entry ($XDG_CONFIG_HOME/autostart/<app>.desktop)."""
+    def __init__(self, app_name: str):
+        self.app_name = app_name
+        base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+        self.path = os.path.join(base, "autostart", app_name.lower().replace(" ", "-") + ".desktop")
+
+    def get(self) -> Optional[str]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    if line.startswith("Exec="): return line[5:].rstrip("\n")
+        except FileNotFoundError:
+            pass
+        return None
+
+    def set(self, command: str):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(f"[Desktop Entry]\nType=Application\nName={self.app_name}\nExec={command}\nX-GNOME-Autostart-enabled=true\n")
+
+    def remove(self):
+        try: os.remove(self.path)
+        except FileNotFoundError: pass
+
+    def command(self, target: str) -> str:
+        # A script is not executable on its own here
+        return f'"{sys.executable}" "{target}"' if target.endswith(".py") else f'"{target}"'
+
+# --- Factories ---
+def startup_service(app_name: str) -> IStartupService:
+    if PLATFORM == "fake":
+        from .fakes import FakeStartup
+        return FakeStartup()
+    return WindowsStartup(app_name) if PLATFORM == "windows" else LinuxStartup(app_name)
+
+def foreground_source():
+    """IForegroundSource for the active window."""
+    if PLATFORM == "fake":
+        from .fakes import FakeForegroundSource
+        return FakeForegroundSource()
+    from .process import Win32ForegroundSource, X11ForegroundSource
+    return Win32ForegroundSource() if PLATFORM == "windows" else X11ForegroundSource()
+
+def process_source():
+    """IProcessSource for the process-start watcher."""
+    if PLATFORM == "fake":
+        from .fakes import FakeProcessSource
+        return FakeProcessSource()
+    from .process import Win32ProcessSource, ProcProcessSource
+    return Win32ProcessSource() if PLATFORM == "windows" else ProcProcessSource()
+
+def hardware(persist_pointer_speed: bool = False) -> tuple:
+    """(mouse, gpu, os_mouse) backends. NVAPI reports itself unavailable off Windows."""
+    if PLATFORM == "fake":
+        from .fakes import FakeMouseBackend, FakeGPUBackend, FakeOSMouseService
+        return FakeMouseBackend(), FakeGPUBackend(), FakeOSMouseService()
+    from .hardware import VXEMouseBackend, NvidiaService, WindowsMouseService, XInputPointerService
+    os_mouse = WindowsMouseService(persist=persist_pointer_speed) if PLATFORM == "windows" else XInputPointerService()
+    return VXEMouseBackend(), NvidiaService(), os_mouse
@@ -0,0 +1,169 @@
+# modules/profiling.py
+"""
+On-demand profiling of a running instance.
+
+- CPU: a sampling profiler that reads the stacks of the Tk main thread and the
+  automation engine thread from sys._current_frames() at a fixed rate, and writes
+  them as collapsed stacks (one "frame;frame;frame count" line per stack), which
+  flamegraph.pl and speedscope read directly.
+- Memory: periodic tracemalloc snapshots, each diffed against the previous one
+  and against the first, appended to a text report.
+
+Started with --profile-cpu / --profile-mem, or from the tray menu. Results go to
+DATA_DIR/profiles/{cpu,mem}-<timestamp>.*
+"""
+import os
+import sys
+import time
+import threading
+import tracemalloc
+import logging
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+from .constants import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.path.join(DATA_DIR, "profiles")
+
+def _stamp() -> str:
+    return time.strftime("%Y%m%d-%H%M%S")
+
+class SamplingProfiler:
+    """
+    Samples the stacks of the named threads every `interval` seconds.
+
+    Only Python-level frames are seen; time spent inside a ctypes/hidapi call shows up
+    as the Python frame that made the call, which is what we want to attribute.
+    """
+    def __init__(self, thread_names: Iterable[str], interval: float = 0.01, directory: str = PROFILE_DIR):
+        self.thread_names, self.interval, self.directory = set(thread_names), interval, directory
+        self._stacks: Counter = Counter()
+        self._samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+
+    @property
+    def active(self) -> bool: return self._thread is not None
+
+    def start(self):
+        if self._thread: return
+        self._stacks.clear()
+        self._samples, self._started = 0, time.time()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="SamplingProfiler", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate() if t.name in self.thread_names}
+            for ident, frame in sys._current_frames().items():
+                if ident == me or ident not in names: continue
+                stack: List[str] = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names[ident])
+                self._stacks[";".join(reversed(stack))] += 1
+            self._samples += 1
+
+    def stop(self) -> Optional[str]:
+        """Stops sampling and writes the collapsed stacks. Returns the file path."""
+        if not self._thread: return None
+        self._stop.set()
+        self._thread.join(timeout=2)
+        self._thread = None
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"cpu-{time.strftime('%Y%m%d-%H%M%S', time.localtime(self._started))}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, n in self._stacks.most_common(): f.write(f"{stack} {n}\n")
+        logger.info(f"CPU profile: {self._samples} samples written to {path}")
+        return path
+
+class MemoryProfiler:
+    """Takes a tracemalloc snapshot every `interval` seconds and appends the top growth to a report."""
+    def __init__(self, interval: float = 60.0, top: int = 25, frames: int = 5, directory: str = PROFILE_DIR):
+        self.interval, self.top, self.frames, self.directory = interval, top, frames, directory
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._first = self._prev = None
+        self._owns_tracing = False  # False if tracemalloc was already running (e.g. PYTHONTRACEMALLOC)
+        self.path: Optional[str] = None
+
+    @property
+    def active(self) -> bool: return self._thread is not None
+
+    def start(self):
+        if self._thread: return
+        self._owns_tracing = not tracemalloc.is_tracing()
+        if self._owns_tracing: tracemalloc.start(self.frames)
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, f"mem-{_stamp()}.txt")
+        self._first = self._prev = tracemalloc.take_snapshot()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="MemoryProfiler", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval): self.snapshot()
+
+    def snapshot(self):
+        """Diffs a new snapshot against the previous and the first one and appends the result."""
+        snap = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+        cur, peak = tracemalloc.get_traced_memory()
+        lines = [f"=== {time.strftime('%Y-%m-%d %H:%M:%S')}  traced {cur / 1024:.0f} KiB (peak {peak / 1024:.0f} KiB)"]
+        for title, base in (("since previous", self._prev), ("since start", self._first)):
+            lines.append(f"--- top {self.top} {title}")
+            lines += [f"  {stat}" for stat in snap.compare_to(base, "lineno")[:self.top]]
+        with open(self.path, "a", encoding="utf-8") as f: f.write("\n".join(lines) + "\n\n")
+        self._prev = snap
+
+    def stop(self) -> Optional[str]:
+        if not self._thread: return None
+        self._stop.set()
+        self._thread.join(timeout=2)
+        self._thread = None
+        self.snapshot()
+        if self._owns_tracing: tracemalloc.stop()
+        self._first = self._prev = None
+        logger.info(f"Memory profile written to {self.path}")
+        return self.path
+
+class Profiler:
+    """CPU and/or memory capture over the Tk main thread and the automation engine thread."""
+    THREADS = ("MainThread", "AutomationEngine")
+
+    def __init__(self, cpu: bool = False, mem: bool = False):
+        self.cpu = SamplingProfiler(self.THREADS)
+        self.mem = MemoryProfiler()
+        self._want_cpu, self._want_mem = cpu, mem
+
+    @classmethod
+    def from_argv(cls, argv: List[str]) -> "Profiler":
+        return cls(cpu="--profile-cpu" in argv, mem="--profile-mem" in argv)
+
+    @property
+    def active(self) -> bool: return self.cpu.active or self.mem.active
+
+    def start(self, cpu: Optional[bool] = None, mem: Optional[bool] = None):
+        """Starts the captures requested on the command line, or the given ones."""
+        if cpu is None: cpu = self._want_cpu
+        if mem is None: mem = self._want_mem
+        if cpu: self.cpu.start()
+        if mem: self.mem.start()
+
+    def stop(self) -> Dict[str, str]:
+        """Stops all running captures. Returns kind -> written file."""
+        out = {}
+        for kind, p in (("cpu", self.cpu), ("mem", self.mem)):
+            path = p.stop()
+            if path: out[kind] = path
+        return out
+
+    def toggle(self):
+        """Tray action: stop whatever runs, or start both captures."""
+        if self.active: self.stop()
+        else: self.start(cpu=True, mem=True)
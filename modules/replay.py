@@ -0,0 +1,170 @@
+# modules/replay.py
+"""
+Record-and-replay of foreground activity.
+
+Recording: `TraceRecorder` wraps the live foreground source and appends one line per
+foreground change to a trace file (started with `--record-trace`).
+
+Replaying: `replay()` feeds a trace to an AutomationEngine built on fake backends and a
+virtual clock, so an hour of Alt-Tabbing replays in well under a second.
+
+Trace format (UTF-8 text, tab separated)::
+
+    #specific-tool-trace 1 <unix start time>
+    <ms since start>\t<exe>\t<window class>\t<image path>
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+from typing import List, Optional, Tuple
+from .process import IForegroundSource, ForegroundInfo, EMPTY
+
+TRACE_HEADER = "#specific-tool-trace 1"
+
+class TraceRecorder(IForegroundSource):
+    """Foreground source decorator that logs every change of the foreground process."""
+    def __init__(self, inner: IForegroundSource, path: str):
+        self.inner, self.path = inner, path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._f = open(path, "w", encoding="utf-8", buffering=1)
+        self._t0 = time.monotonic()
+        self._f.write(f"{TRACE_HEADER} {time.time():.3f}\n")
+        self._last: Optional[ForegroundInfo] = None
+        self._lock = threading.Lock()
+
+    def get_foreground(self) -> ForegroundInfo:
+        info = self.inner.get_foreground()
+        if info != self._last:
+            self._last = info
+            ms = int((time.monotonic() - self._t0) * 1000)
+            with self._lock:
+                if not self._f.closed:
+                    self._f.write(f"{ms}\t{_clean(info.exe)}\t{_clean(info.window_class)}\t{_clean(info.path)}\n")
+        return info
+
+    def close(self):
+        with self._lock: self._f.close()
+
+def _clean(s: str) -> str:
+    return s.replace("\t", " ").replace("\n", " ")
+
+def trace_path(directory: str) -> str:
+    """Returns a new timestamped trace file path inside `directory`."""
+    return os.path.join(directory, time.strftime("trace-%Y%m%d-%H%M%S.trace"))
+
+def load_trace(path: str) -> List[Tuple[float, ForegroundInfo]]:
+    """Reads a trace file into a list of (seconds since start, ForegroundInfo)."""
+    events = []
+    with open(path, "r", encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            line = line.rstrip("\n")
+            if not line: continue
+            if line.startswith("#"):
+                if n == 1 and not line.startswith(TRACE_HEADER):
+                    raise ValueError(f"{path}: not a trace file")
+                continue
+            ms, exe, cls, img = (line.split("\t") + ["", "", ""])[:4]
+            events.append((int(ms) / 1000.0, ForegroundInfo(exe, img, cls) if exe else EMPTY))
+    return events
+
+class ReplayReport:
+    """Outcome of a replay: transitions, hardware writes, decision latency and flapping."""
+    def __init__(self):
+        self.duration = 0.0
+        self.events = 0
+        self.transitions: List[Tuple[float, str, str, str]] = []  # (time, from, to, exe)
+        self.latencies: List[float] = []                          # seconds, foreground change -> transition done
+        self.writes = {}                                          # op -> count
+        self.flaps = 0
+        self.wall_time = 0.0
+
+    def summary(self) -> str:
+        lat = sorted(self.latencies)
+        pct = lambda q: lat[min(len(lat) - 1, int(q * len(lat)))] * 1000 if lat else 0.0
+        lines = [
+            f"Trace duration : {self.duration:.1f}s ({self.events} foreground changes), replayed in {self.wall_time * 1000:.0f}ms",
+            f"Transitions    : {len(self.transitions)}",
+            f"Flaps          : {self.flaps}",
+            f"Latency (ms)   : p50 {pct(0.5):.0f} / p95 {pct(0.95):.0f} / max {pct(1.0):.0f}",
+            "Hardware writes: " + (", ".join(f"{k}={v}" for k, v in sorted(self.writes.items())) or "none"),
+        ]
+        return "\n".join(lines)
+
+def replay(events: List[Tuple[float, ForegroundInfo]], games: List[str], settings: Optional[dict] = None,
+           vib_desk: int = 50, vib_game: int = 100, murqin: bool = False,
+           settle: float = 5.0, flap_window: float = 10.0) -> ReplayReport:
+    """
+    Drives an AutomationEngine with fake backends through `events` on a virtual clock.
+
+    Args:
+        events: Output of load_trace().
+        games: Game entries, as in ConfigManager.games.
+        settle: Seconds to keep running after the last event.
+        flap_window: A transition that undoes the previous one within this many seconds counts as a flap.
+
+    Returns:
+        ReplayReport: Transitions taken, hardware writes issued, decision latency and flapping.
+    """
+    from .core import AutomationEngine, ProcessMonitor
+    from .fakes import VirtualClock, FakeForegroundSource, FakeMouseBackend, FakeGPUBackend, FakeOSMouseService, FakeConfig
+
+    clock = VirtualClock()
+    source = FakeForegroundSource()
+    backends = (FakeMouseBackend(clock), FakeGPUBackend(clock), FakeOSMouseService(clock))
+    ui = {'vib_desk': vib_desk, 'vib_game': vib_game, 'murqin': murqin, 'status': lambda text, is_game: None}
+    cfg = FakeConfig(games, dict(settings or {}, murqin_mode=murqin))
+    engine = AutomationEngine(cfg, *backends, ui.get, monitor=ProcessMonitor(source), clock=clock)
+
+    report = ReplayReport()
+    report.events = len(events)
+    source.play(events, clock)
+    # Times at which the foreground actually changed, for decision latency
+    changes, prev = [], None
+    for t, info in events:
+        if info != prev: changes.append(t); prev = info
+    end = (events[-1][0] if events else 0.0) + settle
+    wall = time.perf_counter()
+    while clock.now <= end:
+        before = engine.current_state
+        dt = engine.tick()
+        if engine.current_state != before:
+            t = clock.now
+            prev = report.transitions[-1] if report.transitions else None
+            if prev and prev[1] == engine.current_state and t - prev[0] <= flap_window: report.flaps += 1
+            report.transitions.append((t, before, engine.current_state, source.current.exe))
+            # The first transition out of "unknown" is start-up, not a reaction to a change
+            if before != "unknown":
+                changed_at = max((c for c in changes if c <= t), default=0.0)
+                report.latencies.append(t - changed_at)
+        clock.sleep(dt)
+    report.wall_time = time.perf_counter() - wall
+    report.duration = end - settle
+
+    for b in backends:
+        for _, op, _ in b.writes: report.writes[op] = report.writes.get(op, 0) + 1
+    return report
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m modules.replay", description="Replay a foreground activity trace against fake backends.")
+    ap.add_argument("trace")
+    ap.add_argument("--games", help="Comma separated game entries (default: games from settings.json)")
+    ap.add_argument("--murqin", action="store_true", help="Replay with Murqin Mode enabled")
+    ap.add_argument("--flap-window", type=float, default=10.0)
+    ap.add_argument("-v", "--verbose", action="store_true", help="List every transition")
+    args = ap.parse_args(argv)
+
+    if args.games is not None:
+        games = [g.strip().lower() for g in args.games.split(",") if g.strip()]
+    else:
+        from .core import ConfigManager
+        games = ConfigManager().games
+
+    report = replay(load_trace(args.trace), games, murqin=args.murqin, flap_window=args.flap_window)
+    if args.verbose:
+        for t, a, b, exe in report.transitions: print(f"{t:10.2f}s  {a:>8} -> {b:<8} {exe}")
+    print(report.summary())
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+# modules/soak.py
+"""
+Memory soak harness.
+
+Builds the real App on fake backends and a throwaway config, then drives it
+through thousands of transitions, scanner opens, game add/remove cycles and
+slider drags, pumping the Tk event loop in between. RSS and live object counts
+by type are sampled along the way; the run fails (exit code 1) if either grows
+past its threshold after warm-up.
+
+    python -m modules.soak --cycles 2000 --max-rss-mb 15 --max-objects 2000
+"""
+import gc
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from collections import Counter
+from typing import Dict, List, Tuple
+
+def rss_bytes() -> int:
+    import psutil
+    return psutil.Process().memory_info().rss
+
+def object_counts() -> Counter:
+    gc.collect()
+    return Counter(type(o).__name__ for o in gc.get_objects())
+
+class SoakReport:
+    def __init__(self):
+        self.samples: List[Tuple[int, int, int]] = []  # (cycle, rss bytes, live objects)
+        self.rss_growth = 0
+        self.type_growth: List[Tuple[str, int]] = []
+        self.failures: List[str] = []
+
+    @property
+    def ok(self) -> bool: return not self.failures
+
+    def summary(self) -> str:
+        lines = [f"{'cycle':>7} {'rss MiB':>9} {'objects':>9}"]
+        lines += [f"{c:>7} {r / 2**20:>9.1f} {o:>9}" for c, r, o in self.samples]
+        lines.append(f"RSS growth after warm-up: {self.rss_growth / 2**20:+.1f} MiB")
+        if self.type_growth:
+            lines.append("Top object growth: " + ", ".join(f"{t} {n:+d}" for t, n in self.type_growth))
+        lines += [f"FAIL: {f}" for f in self.failures] or ["PASS"]
+        return "\n".join(lines)
+
+def _pump(app, seconds: float = 0.0):
+    end = time.monotonic() + seconds
+    while True:
+        app.update()
+        if time.monotonic() >= end: return
+
+def soak(cycles: int = 2000, warmup: int = 200, sample_every: int = 200,
+         max_rss_mb: float = 15.0, max_objects: int = 2000) -> SoakReport:
+    """
+    Runs the soak and returns a SoakReport. Each cycle does one game/desktop
+    transition, one game add + remove, one slider drag; every 10th cycle also
+    opens and closes the process scanner.
+    """
+    from .core import ConfigManager, ProcessMonitor
+    from .fakes import FakeForegroundSource, FakeMouseBackend, FakeGPUBackend, FakeOSMouseService
+    from .ui import App
+
+    tmp = tempfile.mkdtemp(prefix="specific-tool-soak-")
+    cfg = ConfigManager(os.path.join(tmp, "settings.json"))
+    cfg.games = ["game.exe"]
+    cfg.settings.update({"control_api": False, "metrics_port": 0, "prestage": False, "journal": False})
+    source = FakeForegroundSource()
+    source.set("explorer.exe")
+    app = App(config=cfg, hardware=(FakeMouseBackend(), FakeGPUBackend(), FakeOSMouseService()), monitor=ProcessMonitor(source))
+    report = SoakReport()
+    base_rss, base_objs = 0, Counter()
+    try:
+        _pump(app, 0.5)
+        for i in range(1, cycles + 1):
+            # Switch the foreground and have the engine classify it now instead of after the stability delay
+            target = "game" if i % 2 else "desktop"
+            source.set("game.exe" if target == "game" else "explorer.exe")
+            app.engine.call("force", None, timeout=5.0)
+
+            name = f"soak{i}.exe"
+            app.entry_game.delete(0, "end")
+            app.entry_game.insert(0, name)
+            app.add_game()
+            app.remove_game(name)
+
+            for v in range(0, 101, 5): app.on_vib_change(v, target == "game")
+            app.on_vib_change(100, target == "game", final=True)
+
+            if i % 10 == 0:
+                top = app.scan_process()
+                _pump(app)
+                top.destroy()
+            _pump(app)
+
+            if i == warmup:
+                base_rss, base_objs = rss_bytes(), object_counts()
+            if i % sample_every == 0 or i == cycles:
+                report.samples.append((i, rss_bytes(), sum(object_counts().values())))
+                print(f"cycle {i}/{cycles}: rss {report.samples[-1][1] / 2**20:.1f} MiB, {report.samples[-1][2]} objects", flush=True)
+
+        _pump(app, 0.5)
+        end_objs = object_counts()
+        report.rss_growth = rss_bytes() - base_rss
+        growth: Dict[str, int] = {t: end_objs[t] - base_objs.get(t, 0) for t in end_objs}
+        report.type_growth = sorted(((t, n) for t, n in growth.items() if n > 0), key=lambda x: -x[1])[:10]
+        if report.rss_growth > max_rss_mb * 2**20:
+            report.failures.append(f"RSS grew {report.rss_growth / 2**20:.1f} MiB (limit {max_rss_mb} MiB)")
+        total = sum(growth.values())
+        if total > max_objects:
+            report.failures.append(f"live objects grew by {total} (limit {max_objects})")
+    finally:
+        app.engine.call("shutdown", timeout=5.0)
+        if app.tray_icon: app.tray_icon.stop()
+        app.destroy()
+        shutil.rmtree(tmp, ignore_errors=True)
+    return report
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m modules.soak", description="Memory soak test against fake backends.")
+    ap.add_argument("--cycles", type=int, default=2000)
+    ap.add_argument("--warmup", type=int, default=200)
+    ap.add_argument("--sample-every", type=int, default=200)
+    ap.add_argument("--max-rss-mb", type=float, default=15.0)
+    ap.add_argument("--max-objects", type=int, default=2000)
+    args = ap.parse_args(argv)
+    report = soak(args.cycles, args.warmup, args.sample_every, args.max_rss_mb, args.max_objects)
+    print(report.summary())
+    return 0 if report.ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,13 +6,23 @@ import tempfile
 import queue
 import psutil
 import pystray
-from typing import Union
+import logging
+from typing import Optional, Union
 from PIL import Image, ImageDraw
 
 # Assuming these modules/constants exist in the application's structure
-from .constants import APP_NAME, VERSION, THEME, FONT_HEADER, FONT_SUBHEAD, FONT_BODY, FONT_SMALL
-from .core import AppManager, ConfigManager, AutomationEngine, SafetyProtocol
-from .hardware import VXEMouseBackend, NvidiaService, WindowsMouseService
+from .constants import APP_NAME, VERSION, DATA_DIR, THEME, FONT_HEADER, FONT_SUBHEAD, FONT_BODY, FONT_SMALL
+from .core import AppManager, ConfigManager, ConfigChange, ConfigWatcher, AutomationEngine, SafetyProtocol, ProcessMonitor, ProcessStartWatcher, LatestValueApplier, Watchdog
+from .hardware import Bounded, BackendTimeout, CircuitBreaker
+from .platforms import hardware as platform_hardware, foreground_source, process_source, open_folder
+from .metrics import METRICS, MetricsServer
+from .control import ControlServer, ControlError
+from .profiling import Profiler
+from .replay import TraceRecorder, trace_path
+from .journal import Journal
+from .library import LibraryScanner
+
+logger = logging.getLogger(__name__)
 
 # ==========================================================
 # ICON GENERATION UTILITY
@@ -60,19 +70,28 @@ class App(ctk.CTk):
 
     Inherits from customtkinter.CTk. Handles the UI layout, user interactions,
     and coordinates the backend services (Hardware, Automation).
+
+    `config`, `hardware` (mouse, gpu, os_mouse) and `monitor` default to the real
+    services; the soak harness passes fakes.
     """
-    def __init__(self):
+    def __init__(self, profiler: Optional[Profiler] = None, config: Optional[ConfigManager] = None,
+                 hardware: Optional[tuple] = None, monitor: Optional[ProcessMonitor] = None):
         super().__init__()
+        self.profiler = profiler or Profiler()
+        self._monitor = monitor
 
         # --- 1. Managers & Hardware Initialization ---
-        self._init_managers_and_hardware()
+        self._init_managers_and_hardware(config, hardware)
 
         # --- 2. App State Initialization ---
         self._init_app_state()
 
         # --- 3. Core Logic Setup ---
         self.safety = SafetyProtocol(self.hw_mouse, self.hw_gpu, self.hw_os, self.get_ui_state)
-        self.engine = AutomationEngine(self.cfg, self.hw_mouse, self.hw_gpu, self.hw_os, self.get_ui_state)
+        self.journal = self._create_journal()
+        self.engine = AutomationEngine(self.cfg, self.hw_mouse, self.hw_gpu, self.hw_os, self.get_ui_state, monitor=self._create_monitor(), journal=self.journal)
+        # Slider drags fire dozens of events; NVAPI only sees the latest value, at most 20x/s
+        self.vib_applier = LatestValueApplier(lambda v: self.engine.call("vibrance", *v, timeout=5.0), min_interval=0.05, name="vibrance")
 
         # --- 4. UI Setup & System Integration ---
         self.setup_window()
@@ -82,34 +101,70 @@ class App(ctk.CTk):
         self.process_ui_queue()  # Start the UI update loop
 
         # Start the main automation loop in a separate daemon thread
-        threading.Thread(target=self.engine.loop, daemon=True).start()
+        threading.Thread(target=self.engine.loop, name="AutomationEngine", daemon=True).start()
 
         # Handle startup minimized argument
         if "--minimized" in sys.argv:
             self.withdraw()
 
-    def _init_managers_and_hardware(self):
+    def _init_managers_and_hardware(self, config: Optional[ConfigManager] = None, hardware: Optional[tuple] = None):
         """Initializes configuration managers and hardware services."""
-        self.cfg = ConfigManager()
+        self.cfg = config or ConfigManager()
         self.cfg.save()  # Ensure configuration is saved on startup
         self.mgr = AppManager()
         
-
-        self.hw_mouse = VXEMouseBackend()
-        self.hw_mouse_connected = self.hw_mouse.connect()
-        self.hw_gpu = NvidiaService()
-        self.hw_os = WindowsMouseService()
+        if not hardware:
+            hardware = platform_hardware(self.cfg.settings.get("persist_pointer_speed", False))
+        # Every backend call gets a deadline, so a wedged driver cannot hang the engine
+        refresh = lambda: self.enqueue_ui_update(self.render_hardware_status)
+        self.hw_mouse, self.hw_gpu, self.hw_os = (Bounded(b, label, on_change=refresh) for b, label in zip(hardware, ("mouse", "gpu", "os_mouse")))
+        try:
+            self.hw_mouse_connected = self.hw_mouse.connect()
+        except BackendTimeout:
+            self.hw_mouse_connected = False
+        # Breakers open and close on their own from here on; the status rows follow them
+        for backend in (self.hw_mouse, self.hw_gpu):
+            if backend.breaker: backend.breaker.on_change = refresh
+
+    def _create_monitor(self) -> ProcessMonitor:
+        """Creates the foreground monitor, recording a trace if --record-trace was passed."""
+        if self._monitor: return self._monitor
+        source = foreground_source()
+        if "--record-trace" in sys.argv:
+            source = TraceRecorder(source, trace_path(os.path.join(DATA_DIR, "traces")))
+        return ProcessMonitor(source)
+
+    def _create_journal(self) -> Optional[Journal]:
+        """Opens the transition journal, unless disabled in the settings."""
+        if not self.cfg.settings.get("journal", True): return None
+        try:
+            return Journal()
+        except Exception as e:
+            logger.warning(f"Journal unavailable: {e}")
+            return None
 
     def _init_app_state(self):
         """Initializes application state variables and thread safety mechanisms."""
         self.icon_path = setup_custom_icon(self)
         self.tray_icon = None
+        self.scanner = None
         self.running = False
         self.murqin_mode = False
 
         # Thread-safe queue for UI updates
         # Tkinter is NOT thread-safe, so all UI manipulation must be queued
         self.ui_queue = queue.Queue()
+        self._status_lock = threading.Lock()
+        self._pending_status = None
+        METRICS.gauge("specific_tool_ui_queue_depth", "UI updates waiting for the Tk thread.", fn=self.ui_queue.qsize)
+        self.metrics_server = None
+        self.control_server = None
+        self.watcher = None
+        self.config_watcher = None
+        self.watchdog = None
+        self.status_rows = {}  # Hardware status label -> (status label, dot canvas, dot)
+        self._game_rows = {}  # Game entry -> its row in the profiles list
+        self._import_hide = None  # after() id that clears the import result line
 
     def _init_system_integration(self):
         """Sets up window close protocol, minimize binding, and system tray icon."""
@@ -118,6 +173,26 @@ class App(ctk.CTk):
         self.protocol("WM_DELETE_WINDOW", self.quit_safe)
         # Handle minimization to hide window and show tray icon
         self.bind("<Unmap>", self.on_minimize)
+        # Local control channel for launchers/overlays (127.0.0.1 only)
+        if self.cfg.settings.get("control_api", True):
+            self.control_server = ControlServer(self._control_handlers())
+            self.control_server.start()
+        # Opt-in local metrics endpoint (127.0.0.1 only)
+        port = int(self.cfg.settings.get("metrics_port", 0) or 0)
+        if port:
+            self.metrics_server = MetricsServer(port=port)
+            self.metrics_server.start()
+        # Watch for game launches so game mode is ready before the window is
+        if self.cfg.settings.get("prestage", True):
+            try:
+                self.watcher = ProcessStartWatcher(process_source(), lambda info: self.engine.post("prestage", info), want=self.engine.is_game).start()
+            except Exception as e:
+                logger.warning(f"Process watcher unavailable, games are picked up by foreground polling only: {e}")
+        # Pick up settings.json pushed by other tools; reloads run on the Tk thread like user edits
+        if self.cfg.settings.get("watch_config", True):
+            self.config_watcher = ConfigWatcher(self.cfg, lambda: self.enqueue_ui_update(self.hot_reload)).start()
+        # Flags the Dashboard and logs the engine's stack if its loop stops beating
+        self.watchdog = Watchdog(self.engine, lambda: self.enqueue_ui_update(self.render_hardware_status)).start()
 
     # ==========================================================
     # THREAD-SAFE UI UPDATE MECHANISM
@@ -168,6 +243,8 @@ class App(ctk.CTk):
                 return bool(self.chk_murqin.get())
             if key == 'status':
                 return self.update_status_ui
+            if key == 'running':
+                return lambda running: self.enqueue_ui_update(self.render_engine_state)
         except Exception:
             # Provide a safe default value
             return 50 if 'vib' in key else None
@@ -176,13 +253,24 @@ class App(ctk.CTk):
         """
         Updates the main status label and dot color, ensuring it's executed
         in the main UI thread via the queue.
+
+        Status updates coalesce: if several arrive before the UI thread gets to
+        them, only the latest is applied and only one closure is queued.
         """
-        def _update():
-            dot_color = THEME["ACCENT"] if is_game else THEME["TEXT_SEC"]
-            text_color = THEME["TEXT_PRI"] if is_game else THEME["TEXT_SEC"]
-            self.lbl_status_dot.configure(text_color=dot_color)
-            self.lbl_status_text.configure(text=text, text_color=text_color)
-        self.enqueue_ui_update(_update)
+        with self._status_lock:
+            queued = self._pending_status is not None
+            self._pending_status = (text, is_game)
+        if not queued:
+            self.enqueue_ui_update(self._apply_status)
+
+    def _apply_status(self):
+        with self._status_lock:
+            text, is_game = self._pending_status
+            self._pending_status = None
+        dot_color = THEME["ACCENT"] if is_game else THEME["TEXT_SEC"]
+        text_color = THEME["TEXT_PRI"] if is_game else THEME["TEXT_SEC"]
+        self.lbl_status_dot.configure(text_color=dot_color)
+        self.lbl_status_text.configure(text=text, text_color=text_color)
 
     # ==========================================================
     # LAYOUT CONSTRUCTION
@@ -251,7 +339,7 @@ class App(ctk.CTk):
     # --- Component Builders ---
 
     def create_status_row(self, parent, label: str, status: str, active: bool):
-        """Creates a full-width status row with visible border."""
+        """Creates a full-width status row with visible border. Kept in status_rows for set_status_row()."""
         # Container
         row = ctk.CTkFrame(parent, fg_color="transparent", border_width=1, border_color=THEME["BORDER"], corner_radius=8)
         row.pack(fill="x", pady=(0, 10))
@@ -267,11 +355,39 @@ class App(ctk.CTk):
         dot_color = THEME["SUCCESS"] if active else THEME["CRITICAL"]
         canvas = ctk.CTkCanvas(inner, width=8, height=8, bg=THEME["BG"], highlightthickness=0)
         canvas.pack(side="right", padx=(10, 0))
-        canvas.create_oval(1, 1, 7, 7, fill=dot_color, outline="")
+        dot = canvas.create_oval(1, 1, 7, 7, fill=dot_color, outline="")
 
         # Status Text (Right of Dot)
         stat_txt = status.upper()
-        ctk.CTkLabel(inner, text=stat_txt, font=("Arial", 11, "bold"), text_color=THEME["TEXT_PRI"]).pack(side="right")
+        lbl = ctk.CTkLabel(inner, text=stat_txt, font=("Arial", 11, "bold"), text_color=THEME["TEXT_PRI"])
+        lbl.pack(side="right")
+        self.status_rows[label] = (lbl, canvas, dot)
+
+    def set_status_row(self, label: str, status: str, active: bool):
+        """Updates an existing status row in place."""
+        lbl, canvas, dot = self.status_rows[label]
+        lbl.configure(text=status.upper())
+        canvas.itemconfigure(dot, fill=THEME["SUCCESS"] if active else THEME["CRITICAL"])
+
+    @staticmethod
+    def _backend_status(backend, up: str, down: str, present: bool):
+        """(status text, active) for a hardware row: deadline first, then the circuit breaker."""
+        if backend.stuck: return "NOT RESPONDING", False
+        breaker = backend.breaker
+        if not present or not breaker: return (up, True) if present else (down, False)
+        if breaker.state == CircuitBreaker.OPEN: return down, False
+        if breaker.state == CircuitBreaker.HALF_OPEN: return "RETRYING", False
+        if breaker.failures: return "ERRORS", False
+        return up, True
+
+    def render_hardware_status(self):
+        """Refreshes the hardware status rows from the watchdog, deadlines and breakers. Tk thread only."""
+        if not self.status_rows: return
+        stalled = self.watchdog.stalled_for if self.watchdog else 0.0
+        self.set_status_row("ENGINE", f"STALLED {stalled:.0f}s" if stalled else "RUNNING", not stalled)
+        # With a breaker, "connected" is whatever the last attempt showed, not the start-up result
+        self.set_status_row("MOUSE", *self._backend_status(self.hw_mouse, "ONLINE", "OFFLINE", self.hw_mouse_connected or bool(self.hw_mouse.breaker)))
+        self.set_status_row("NVIDIA", *self._backend_status(self.hw_gpu, "READY", "NOT FOUND", self.hw_gpu.available))
 
     def create_vercel_switch(self, parent, text: str, subtext: str, cmd=None):
         """Creates a switch component with main and sub text, resembling Vercel's UI style."""
@@ -360,16 +476,25 @@ class App(ctk.CTk):
         g_status = "READY" if self.hw_gpu.available else "NOT FOUND"
         self.create_status_row(status_container, "NVIDIA", g_status, self.hw_gpu.available)
 
+        # Automation Loop Row (the watchdog flips it on a stall)
+        self.create_status_row(status_container, "ENGINE", "RUNNING", True)
+        self.render_hardware_status()
+
     def build_profiles(self, p: ctk.CTkFrame):
         """Constructs the content for the Profiles view."""
         # 1. Unified Input Bar (Add Game)
         inp_card = ctk.CTkFrame(p, fg_color="transparent", border_width=1, border_color=THEME["BORDER"], corner_radius=8)
         inp_card.pack(fill="x", pady=(0, 15))
+        # Import result line, shown under the input bar while there is something to say
+        self.lbl_import = ctk.CTkLabel(p, text="", font=FONT_SMALL, text_color=THEME["TEXT_SEC"], height=0)
 
         # Add Button
         ctk.CTkButton(inp_card, text="+", width=40, height=32, fg_color=THEME["ACCENT"], text_color="#000000", hover_color="#CCCCCC", corner_radius=6, command=self.add_game).pack(side="right", padx=(5, 8), pady=4)
         # Scan Button
         ctk.CTkButton(inp_card, text="Scan", width=40, height=32, fg_color=THEME["ACCENT"], text_color="#000000", hover_color="#CCCCCC", corner_radius=6, border_width=0, command=self.scan_process).pack(side="right", padx=(0, 5))
+        # Import Button (Steam / Epic libraries)
+        self.btn_import = ctk.CTkButton(inp_card, text="Import", width=40, height=32, fg_color=THEME["ACCENT"], text_color="#000000", hover_color="#CCCCCC", corner_radius=6, border_width=0, command=self.import_library)
+        self.btn_import.pack(side="right", padx=(0, 5))
         # Entry Field
         self.entry_game = ctk.CTkEntry(inp_card, placeholder_text="executable_name.exe", border_width=0, fg_color="transparent", text_color=THEME["TEXT_PRI"], placeholder_text_color=THEME["TEXT_SEC"], height=32, font=FONT_BODY)
         self.entry_game.pack(side="left", fill="x", expand=True, padx=(10, 5), pady=0)
@@ -398,6 +523,7 @@ class App(ctk.CTk):
         )
         self.slider_vib_game.set(100)
         self.slider_vib_game.pack(fill="x", padx=15, pady=(0, 15))
+        self.slider_vib_game.bind("<ButtonRelease-1>", lambda e: self.on_vib_change(self.slider_vib_game.get(), True, final=True))
 
     def build_settings(self, p: ctk.CTkFrame):
         """Constructs the content for the Settings view."""
@@ -442,12 +568,13 @@ class App(ctk.CTk):
         )
         self.slider_vib_desk.set(50)
         self.slider_vib_desk.pack(fill="x", padx=15, pady=(0, 15))
+        self.slider_vib_desk.bind("<ButtonRelease-1>", lambda e: self.on_vib_change(self.slider_vib_desk.get(), False, final=True))
 
         # 3. Config Folder Button
         ctk.CTkButton(
             p, text="Open Config Folder", fg_color="transparent", text_color=THEME["TEXT_SEC"],
             font=FONT_SMALL, hover_color=THEME["HOVER"],
-            command=lambda: os.startfile(self.mgr.appdata_dir)
+            command=lambda: open_folder(self.mgr.appdata_dir)
         ).pack()
 
     # ==========================================================
@@ -455,40 +582,42 @@ class App(ctk.CTk):
     # ==========================================================
 
     def toggle_engine(self):
-        """Toggles the automation engine on/off and updates the dashboard UI."""
-        self.engine.running = not self.engine.running
-        is_running = self.engine.running
+        """Asks the engine to start/stop automation; the dashboard updates once it has."""
+        # Execute safety protocol (e.g., reset settings) on stop, on the engine thread
+        self.engine.post("toggle", self.safety.restore)
 
-        if is_running:
+    def render_engine_state(self):
+        """Updates the toggle button and status label to match the engine's running state."""
+        if self.engine.running:
             self.btn_toggle.configure(text="STOP AUTOMATION", fg_color=THEME["CRITICAL"], text_color="#FFFFFF")
             self.lbl_status_text.configure(text="Monitoring Process...")
             self.lbl_status_dot.configure(text_color=THEME["ACCENT"])
         else:
             self.btn_toggle.configure(text="START AUTOMATION", fg_color=THEME["ACCENT"], text_color="#000000")
-            # Execute safety protocol (e.g., reset settings) on stop
-            self.safety.execute()
             self.lbl_status_text.configure(text="System Idle")
             self.lbl_status_dot.configure(text_color=THEME["TEXT_SEC"])
-            self.engine.current_state = "unknown"
 
-    def on_vib_change(self, value: float, is_game: bool):
+    def on_vib_change(self, value: float, is_game: bool, final: bool = False):
         """
         Updates the vibrance label and applies the setting if the engine is running
         and the current state matches the change (game or desktop).
+
+        Values go through the vibrance applier to the engine thread; `final` (drag
+        released) sends the value immediately instead of waiting for the rate cap.
         """
         val = int(value)
         lbl = self.lbl_vib_game if is_game else self.lbl_vib_desk
         lbl.configure(text=f"{val}%")
 
-        mode = "game" if is_game else "desktop"
-        # Only apply the setting if the engine is active in the corresponding state
-        if self.engine.running and self.engine.current_state == mode:
-            try:
-                primary_only = bool(self.chk_single.get())
-            except AttributeError:
-                # Fallback if chk_single is not yet initialized (shouldn't happen post-setup)
-                primary_only = False
-            self.hw_gpu.set_vibrance(val, primary_only=primary_only)
+        try:
+            primary_only = bool(self.chk_single.get())
+        except AttributeError:
+            # Fallback if chk_single is not yet initialized (shouldn't happen post-setup)
+            primary_only = False
+        # The engine only applies it if it is running in the corresponding state
+        v = (val, primary_only, "game" if is_game else "desktop")
+        if final: self.vib_applier.flush(v)
+        else: self.vib_applier.submit(v)
 
     def toggle_murqin(self):
         """Toggles the Murqin Mode setting."""
@@ -507,10 +636,7 @@ class App(ctk.CTk):
         
         if state:
             start_minimized = bool(self.chk_tray.get())
-            path = f'"{self.mgr.target_path}"'
-            if start_minimized:
-                path += " --minimized"
-            self.mgr.set_startup_value(path)
+            self.mgr.set_startup_value(self.mgr.startup_command(start_minimized))
         else:
             self.mgr.set_startup(False)
 
@@ -526,19 +652,53 @@ class App(ctk.CTk):
         # Update startup path if startup is enabled and minimized setting changed
         if bool(self.chk_startup.get()):
             minimized = bool(self.chk_tray.get())
-            path = f'"{self.mgr.target_path}"'
-            if minimized:
-                path += " --minimized"
-            self.mgr.set_startup_value(path)
+            self.mgr.set_startup_value(self.mgr.startup_command(minimized))
 
     def add_game(self):
         """Adds a process executable name to the tracked games list."""
         game_name = self.entry_game.get().lower().strip()
-        if game_name and game_name not in self.cfg.games:
-            self.cfg.games.append(game_name)
+        if game_name and self._add_games([game_name]):
+            self.entry_game.delete(0, "end")
+
+    def _add_games(self, names) -> tuple:
+        """Adds the names not tracked yet with one save and one engine update. Returns them."""
+        added = tuple(dict.fromkeys(n for n in names if n not in self.cfg.games))
+        if added:
+            self.cfg.games.extend(added)
             self.cfg.save()
             self.update_game_list()
-            self.entry_game.delete(0, "end")
+            self.engine.post("config", ConfigChange(added=added))
+        return added
+
+    def import_library(self):
+        """Adds the games installed through Steam / Epic. Manifests are scanned off the Tk thread."""
+        self.btn_import.configure(state="disabled", text="...")
+        def work():
+            try:
+                found = LibraryScanner().scan()
+            except Exception as e:
+                logger.error(f"Library import failed: {e}")
+                msg = f"Import failed: {e}"
+                self.enqueue_ui_update(lambda: self._show_import(msg, error=True))
+                return
+            self.enqueue_ui_update(lambda: self._import_done(found))
+        threading.Thread(target=work, name="LibraryImport", daemon=True).start()
+
+    def _import_done(self, found: list):
+        """Adds the scanned games and reports how many were new. Tk thread only."""
+        added = self._add_games(g.exe for g in found)
+        logger.info(f"Library import: {len(found)} games found, {len(added)} added")
+        if added: self._show_import(f"{len(added)} game{'s' if len(added) != 1 else ''} added ({len(found)} found)")
+        elif found: self._show_import(f"All {len(found)} installed games are already tracked")
+        else: self._show_import("No Steam or Epic games found")
+
+    def _show_import(self, text: str, error: bool = False):
+        """Shows an import result under the input bar for a few seconds."""
+        self.btn_import.configure(state="normal", text="Import")
+        self.lbl_import.configure(text=text, text_color=THEME["CRITICAL"] if error else THEME["TEXT_SEC"])
+        self.lbl_import.pack(after=self.btn_import.master, fill="x", anchor="w", padx=5, pady=(0, 10))
+        if self._import_hide: self.after_cancel(self._import_hide)
+        self._import_hide = self.after(6000, self.lbl_import.pack_forget)
 
     def remove_game(self, game_name: str):
         """Removes a process executable name from the tracked games list."""
@@ -546,29 +706,67 @@ class App(ctk.CTk):
             self.cfg.games.remove(game_name)
             self.cfg.save()
             self.update_game_list()
+            self.engine.post("config", ConfigChange(removed=(game_name,)))
 
     def update_game_list(self):
-        """Clears and repopulates the scrollable frame with the current list of games."""
-        # Clear existing widgets
-        for w in self.scroll_list.winfo_children():
-            w.destroy()
-        
-        # Create a row for each game
+        """Brings the scrollable frame in line with the list of games, only touching rows that changed."""
+        games = set(self.cfg.games)
+        for g in [g for g in self._game_rows if g not in games]:
+            self._game_rows.pop(g).destroy()
         for g in self.cfg.games:
-            r = ctk.CTkFrame(self.scroll_list, fg_color="transparent", height=40)
-            r.pack(fill="x", pady=2)
-            ctk.CTkLabel(r, text=g, font=FONT_BODY, text_color=THEME["TEXT_PRI"]).pack(side="left", padx=10)
-            ctk.CTkButton(
-                r, text="Delete", width=50, height=25,
-                fg_color="transparent", border_width=1,
-                border_color=THEME["BORDER"], text_color=THEME["TEXT_SEC"],
-                hover_color=THEME["CRITICAL"],
-                command=lambda n=g: self.remove_game(n)
-            ).pack(side="right", padx=10)
+            if g not in self._game_rows:
+                self._game_rows[g] = self._create_game_row(g)
+
+    def _create_game_row(self, g: str) -> ctk.CTkFrame:
+        r = ctk.CTkFrame(self.scroll_list, fg_color="transparent", height=40)
+        r.pack(fill="x", pady=2)
+        ctk.CTkLabel(r, text=g, font=FONT_BODY, text_color=THEME["TEXT_PRI"]).pack(side="left", padx=10)
+        ctk.CTkButton(
+            r, text="Delete", width=50, height=25,
+            fg_color="transparent", border_width=1,
+            border_color=THEME["BORDER"], text_color=THEME["TEXT_SEC"],
+            hover_color=THEME["CRITICAL"],
+            command=lambda n=g: self.remove_game(n)
+        ).pack(side="right", padx=10)
+        return r
+
+    def hot_reload(self):
+        """
+        Merges the settings file into the running configuration and applies only what changed.
+        Runs on the Tk thread.
+
+        Returns:
+            The engine's "config" command, or None if the file was invalid (and ignored).
+        """
+        change = self.cfg.reload()
+        if change is None: return None
+        if not change.empty: self.render_config(change)
+        return self.engine.post("config", change)
+
+    def render_config(self, change: ConfigChange):
+        """Updates the game rows and the switches whose settings changed."""
+        if change.added or change.removed: self.update_game_list()
+        switches = {"murqin_mode": self.chk_murqin, "single_monitor": self.chk_single, "start_in_tray": self.chk_tray}
+        for key, value in change.settings.items():
+            sw = switches.get(key)
+            if sw is None: continue
+            if value: sw.select()
+            else: sw.deselect()
+            if key == "murqin_mode": self.murqin_mode = bool(value)
 
     def scan_process(self):
-        """Opens a new top-level window for scanning and selecting running processes."""
-        top = ctk.CTkToplevel(self)
+        """
+        Opens the top-level window for scanning and selecting running processes,
+        or brings the existing one to the front.
+
+        Returns:
+            The scanner's CTkToplevel.
+        """
+        if self.scanner is not None and self.scanner.winfo_exists():
+            self.scanner.lift()
+            self.scanner.focus_force()
+            return self.scanner
+        top = self.scanner = ctk.CTkToplevel(self)
         top.title(f"{APP_NAME} - Scanner")
         top.geometry("400x500")
         top.configure(fg_color=THEME["BG"])
@@ -576,7 +774,7 @@ class App(ctk.CTk):
         # Set icon for Toplevel
         if self.icon_path and os.path.exists(self.icon_path):
             # Must use after() to ensure the window is mapped before setting the icon
-            top.after(200, lambda: top.iconbitmap(self.icon_path))
+            top.after(200, lambda: top.winfo_exists() and top.iconbitmap(self.icon_path))
 
         # Header
         head = ctk.CTkFrame(top, fg_color="transparent")
@@ -623,6 +821,49 @@ class App(ctk.CTk):
         e.bind("<KeyRelease>", lambda ev: load(e.get()))
         # Initial load
         load()
+        return top
+
+    # ==========================================================
+    # CONTROL CHANNEL
+    # ==========================================================
+
+    # Handlers run on the control server's thread. State changes and hardware work
+    # are posted to the engine and waited on; widgets are only touched via the UI queue.
+
+    CONTROL_TIMEOUT = 10.0
+
+    def _control_handlers(self) -> dict:
+        return {
+            "force-game": lambda args: self._control_force("game"),
+            "force-desktop": lambda args: self._control_force("desktop"),
+            "auto": lambda args: self._control_force(None),
+            "reload-config": self._control_reload,
+            "pause": lambda args: self.engine.call("pause", self.safety.restore, timeout=self.CONTROL_TIMEOUT),
+            "resume": lambda args: self.engine.call("resume", timeout=self.CONTROL_TIMEOUT),
+            "status": lambda args: self.engine.call("status", timeout=self.CONTROL_TIMEOUT),
+            "show": self._control_show,
+        }
+
+    def _control_show(self, args):
+        """Handoff from a second launch: show the window unless it was started --minimized (e.g. at login)."""
+        if "--minimized" in (args.get("argv") or []): return {"shown": False}
+        self.show_safe()
+        return {"shown": True}
+
+    def _control_force(self, target):
+        status = self.engine.call("force", target, timeout=self.CONTROL_TIMEOUT)
+        if not status["running"]:
+            raise ControlError("automation is paused")
+        return status
+
+    def _control_reload(self, args):
+        # Same path as a watched change, so the switches are updated before the engine re-applies
+        done = queue.Queue(maxsize=1)
+        self.enqueue_ui_update(lambda: done.put(self.hot_reload()))
+        try: cmd = done.get(timeout=self.CONTROL_TIMEOUT)
+        except queue.Empty: raise ControlError("UI did not respond")
+        if cmd is None: raise ControlError("settings file is invalid")
+        return cmd.wait(self.CONTROL_TIMEOUT)
 
     # ==========================================================
     # SYSTEM TRAY INTEGRATION
@@ -640,6 +881,10 @@ class App(ctk.CTk):
         self.lift()      # Bring to front
         self.focus_force() # Focus the window
 
+    def toggle_profiling(self, i=None, it=None):
+        """Starts or stops a CPU + memory capture (results go to the profiles folder)."""
+        threading.Thread(target=self.profiler.toggle, daemon=True).start()
+
     def quit_safe(self, i=None, it=None):
         """Thread-safe method to safely exit the application."""
         self.after(0, self._quit)
@@ -648,7 +893,23 @@ class App(ctk.CTk):
         """Performs cleanup and shuts down the application."""
         if self.tray_icon:
             self.tray_icon.stop() # Stop the pystray thread
-        self.safety.execute() # Execute final safety protocol (e.g., reset vibrance)
+        if self.control_server:
+            self.control_server.stop() # Remove the control.json discovery file
+        if self.watcher:
+            self.watcher.stop()
+        if self.config_watcher:
+            self.config_watcher.stop()
+        if self.watchdog:
+            self.watchdog.stop()
+        try:
+            # Stop the engine and restore defaults on its thread, so nothing is mid-transition
+            self.engine.call("shutdown", self.safety.execute, timeout=3.0)
+        except Exception:
+            pass
+        self.safety.execute() # Execute final safety protocol (no-op if the engine already did)
+        if self.journal:
+            self.journal.close() # Flush the mapped journal segment
+        self.profiler.stop() # Flush any running CPU/memory capture to disk
         self.destroy() # Destroy the main window
         sys.exit() # Exit the process
 
@@ -668,6 +929,7 @@ class App(ctk.CTk):
                 # Define the tray icon menu
                 menu = (
                     pystray.MenuItem('Show', self.show_safe, default=True),
+                    pystray.MenuItem(lambda item: 'Stop Profiling' if self.profiler.active else 'Start Profiling', self.toggle_profiling),
                     pystray.MenuItem('Quit', self.quit_safe)
                 )
                 # Initialize and run the icon